@@ -1,28 +1,186 @@
-import json 
-from typing import Optional, Any 
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional, Any
+from sqlalchemy import Engine, event
+from sqlalchemy.orm import Session as SASession
 from sqlmodel import Session
 
+from app.core.audit_partitions import (
+    GENERATED_COLUMNS,
+    PENDING_PARTITIONS_KEY,
+    forget_partitions,
+    partitions_committed,
+    write_rows
+)
+from app.core.config import settings
+from app.db.session import engine
 from app.models.audit_log import AuditLog, EntityType
 
+logger = logging.getLogger(__name__)
 
-def log_action(session: Session, 
-               user_id: int, 
-               action: str, 
-               entity_type: EntityType, entity_id: Optional[int]=None, 
+AUDIT_SYNC = "sync"
+AUDIT_ASYNC = "async"
+
+# audit rows of the open transaction: written just before it commits (sync)
+# or handed to the writer once it has (async)
+_PENDING_KEY = "pending_audit"
+_STOP = object()
+# a failed batch is retried with exponential backoff: 0.5s, 1s, 2s, 4s
+_WRITE_ATTEMPTS = 5
+_RETRY_DELAY_SECONDS = 0.5
+
+
+class AuditWriter:
+    """Background thread that inserts queued audit rows in batches.
+
+    A batch is written once it reaches `batch_size` rows or `flush_interval`
+    seconds after its first row, whichever comes first. Rows still queued
+    when the process dies are lost, which bounds the loss window to roughly
+    one interval. A failing batch is retried with backoff and only logged
+    (with its rows) once every attempt failed.
+
+    Back-pressure is bounded: when the queue stays full for one interval,
+    the submitting thread writes its rows itself instead of waiting longer.
+    """
+
+    def __init__(self, engine: Engine, batch_size: int, flush_interval: float, max_queue: int):
+        self.engine = engine
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, rows: list[dict[str, Any]]) -> None:
+        self.start()
+        for index, row in enumerate(rows):
+            try:
+                self._queue.put(row, timeout=self.flush_interval)
+            except queue.Full:
+                # the writer is behind; write the rest here rather than wait on it
+                self._write(rows[index:])
+                return
+
+    def _run(self) -> None:
+        while True:
+            row = self._queue.get()
+            if row is _STOP:
+                return
+
+            batch = [row]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    row = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if row is _STOP:
+                    stop = True
+                    break
+                batch.append(row)
+
+            self._write(batch)
+            if stop:
+                return
+
+    def _write(self, rows: list[dict[str, Any]]) -> None:
+        for attempt in range(_WRITE_ATTEMPTS):
+            try:
+                with self.engine.begin() as conn:
+                    months = write_rows(conn, rows)
+            except Exception:
+                forget_partitions()
+                if attempt + 1 == _WRITE_ATTEMPTS:
+                    logger.exception(
+                        "Dropping %d audit log entries after %d failed attempts: %r",
+                        len(rows), _WRITE_ATTEMPTS, rows
+                    )
+                    return
+                logger.warning("Audit log write failed, retrying", exc_info=True)
+                time.sleep(_RETRY_DELAY_SECONDS * 2 ** attempt)
+            else:
+                partitions_committed(months)
+                return
+
+    def shutdown(self) -> None:
+        """Flush everything queued so far and stop the thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join()
+
+
+audit_writer = AuditWriter(
+    engine,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    max_queue=settings.AUDIT_QUEUE_SIZE
+)
+
+
+def _write_before_commit(session: SASession) -> None:
+    # one write_rows call per transaction, however many actions it audits
+    if settings.AUDIT_DURABILITY == AUDIT_ASYNC:
+        return
+    rows = session.info.pop(_PENDING_KEY, None)
+    if rows:
+        months = write_rows(session.connection(), rows)
+        session.info.setdefault(PENDING_PARTITIONS_KEY, set()).update(months)
+
+
+def _hand_over_on_commit(session: SASession) -> None:
+    rows = session.info.pop(_PENDING_KEY, None)
+    if rows:
+        audit_writer.submit(rows)
+
+
+def _discard_on_rollback(session: SASession) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+event.listen(SASession, "before_commit", _write_before_commit)
+event.listen(SASession, "after_commit", _hand_over_on_commit)
+event.listen(SASession, "after_rollback", _discard_on_rollback)
+
+
+def log_action(session: Session,
+               user_id: int,
+               action: str,
+               entity_type: EntityType, entity_id: Optional[int]=None,
                meta:Optional[dict[str, Any]]=None) -> AuditLog:
-    
-    meta_str = json.dumps(meta) if meta else None
+    """Record an action as part of the caller's transaction.
 
+    Rows go to the month partition of their created_at. With
+    AUDIT_DURABILITY=sync the rows of a transaction are inserted together
+    just before it commits, so they are committed with the writes being
+    audited. With `async` they are queued when that transaction commits
+    (and dropped if it rolls back) and inserted later by the audit writer;
+    if the queue is full the commit waits at most one flush interval and
+    then writes the rows itself.
+    """
     audit_log = AuditLog(
-        user_id = user_id, 
+        user_id = user_id,
         action=action,
         entity_type = entity_type,
         entity_id=entity_id,
-        meta=meta_str
+        meta=meta or None,
+        created_at=datetime.now(timezone.utc)
     )
 
-    session.add(audit_log)
-    session.commit()
-    session.refresh(audit_log)
+    row = audit_log.model_dump(exclude={"id", *GENERATED_COLUMNS})
+    session.info.setdefault(_PENDING_KEY, []).append(row)
     return audit_log
-
@@ -0,0 +1,283 @@
+import logging
+import re
+import threading
+from collections import Counter
+from datetime import date, datetime, timezone
+from typing import Any, Iterable, Optional
+from sqlalchemy import Column, Computed, Connection, Engine, Index, MetaData, Table, event, insert, inspect, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session as SASession
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app.core.config import settings
+from app.models.audit_log import AuditDailyCount, AuditLog, AuditLogSequence
+
+logger = logging.getLogger(__name__)
+
+# Audit rows live in one table per month, `audit_logs_YYYYMM`, with the
+# columns and indexes of AuditLog. Retention drops whole tables and queries
+# only read the months they cover. The `audit_logs` table itself only holds
+# rows written before partitioning, until the start-up migration moves them.
+
+BASE_TABLE = AuditLog.__tablename__
+_PARTITION_NAME = re.compile(rf"^{BASE_TABLE}_(\d{{6}})$")
+
+# virtual columns are computed by SQLite and never written
+GENERATED_COLUMNS = frozenset(c.name for c in AuditLog.__table__.columns if c.computed is not None)
+_WRITABLE_COLUMNS = [c.name for c in AuditLog.__table__.columns if c.computed is None]
+
+# months written to by a session's open transaction, confirmed on commit
+PENDING_PARTITIONS_KEY = "pending_audit_partitions"
+
+_metadata = MetaData()
+_tables: dict[str, Table] = {}
+# months whose table is known to be committed; only filled after commit
+_ensured: set[str] = set()
+_lock = threading.Lock()
+
+
+def month_key(value: date) -> str:
+    return f"{value.year:04d}{value.month:02d}"
+
+
+def _shift_month(key: str, months: int) -> str:
+    index = int(key[:4]) * 12 + int(key[4:]) - 1 + months
+    return f"{index // 12:04d}{index % 12 + 1:02d}"
+
+
+def _copy_column(column: Column) -> Column:
+    # no foreign keys: partitions are dropped wholesale by retention
+    extra = []
+    if column.computed is not None:
+        extra.append(Computed(column.computed.sqltext, persisted=column.computed.persisted))
+    return Column(column.name, column.type, *extra, primary_key=column.primary_key, nullable=column.nullable)
+
+
+def partition_table(key: str) -> Table:
+    with _lock:
+        table = _tables.get(key)
+        if table is None:
+            name = f"{BASE_TABLE}_{key}"
+            source = AuditLog.__table__
+            table = Table(
+                name,
+                _metadata,
+                *(_copy_column(c) for c in source.columns)
+            )
+            for index in source.indexes:
+                Index(index.name.replace(BASE_TABLE, name, 1), *(table.c[c.name] for c in index.columns))
+            _tables[key] = table
+        return table
+
+
+def list_partitions(conn: Connection) -> list[str]:
+    """Existing month keys, oldest first."""
+    names = conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE :pattern"
+    ), {"pattern": f"{BASE_TABLE}_%"}).scalars()
+    return sorted(match.group(1) for match in map(_PARTITION_NAME.match, names) if match)
+
+
+def partitions_between(conn: Connection, start: Optional[date], end: Optional[date]) -> list[Table]:
+    """Partitions overlapping [start, end], newest first."""
+    low = month_key(start) if start else None
+    high = month_key(end) if end else None
+    return [
+        partition_table(key)
+        for key in reversed(list_partitions(conn))
+        if (low is None or key >= low) and (high is None or key <= high)
+    ]
+
+
+def ensure_partition(conn: Connection, key: str) -> Table:
+    """Create the month table if needed; idempotent across connections.
+
+    Call with the database write lock held (any prior write in the
+    transaction), so concurrent writers create it one after another.
+    """
+    table = partition_table(key)
+    if key not in _ensured:
+        conn.execute(CreateTable(table, if_not_exists=True))
+        for index in table.indexes:
+            conn.execute(CreateIndex(index, if_not_exists=True))
+    return table
+
+
+def partitions_committed(keys: Iterable[str]) -> None:
+    """Trust these month tables from now on; call after the transaction that
+    wrote to them has committed."""
+    with _lock:
+        _ensured.update(keys)
+
+
+def seed_sequence(conn: Connection) -> None:
+    """Start the id sequence after the highest id already stored."""
+    tables = [BASE_TABLE] + [f"{BASE_TABLE}_{key}" for key in list_partitions(conn)]
+    last_id = max(
+        conn.execute(text(f"SELECT COALESCE(MAX(id), 0) FROM {name}")).scalar()
+        for name in tables
+    )
+    conn.execute(
+        text(f"INSERT OR IGNORE INTO {AuditLogSequence.__tablename__} (id, last_id) VALUES (1, :last_id)"),
+        {"last_id": last_id}
+    )
+
+
+def _allocate_ids(conn: Connection, count: int) -> int:
+    """Reserve `count` consecutive ids and return the first. The UPDATE takes
+    SQLite's write lock, which serializes everything after it in write_rows."""
+    allocate = text(
+        f"UPDATE {AuditLogSequence.__tablename__} SET last_id = last_id + :count "
+        "WHERE id = 1 RETURNING last_id"
+    )
+    last_id = conn.execute(allocate, {"count": count}).scalar()
+    if last_id is None:
+        seed_sequence(conn)
+        last_id = conn.execute(allocate, {"count": count}).scalar()
+    return last_id - count + 1
+
+
+def add_generated_columns(conn: Connection) -> None:
+    """Add virtual columns introduced after a table was created (SQLite allows ADD COLUMN for VIRTUAL)."""
+    names = [BASE_TABLE] + [f"{BASE_TABLE}_{key}" for key in list_partitions(conn)]
+    for name in names:
+        existing = {c["name"] for c in inspect(conn).get_columns(name)}
+        for column in AuditLog.__table__.columns:
+            if column.computed is not None and column.name not in existing:
+                conn.execute(text(
+                    f"ALTER TABLE {name} ADD COLUMN {column.name} {column.type.compile(conn.dialect)} "
+                    f"GENERATED ALWAYS AS ({column.computed.sqltext}) VIRTUAL"
+                ))
+
+
+def create_partition_indexes(conn: Connection) -> None:
+    # partitions created before an index was added to AuditLog
+    for key in list_partitions(conn):
+        for index in partition_table(key).indexes:
+            index.create(conn, checkfirst=True)
+
+
+def oldest_kept_month(now: Optional[datetime] = None) -> Optional[str]:
+    """First month inside AUDIT_RETENTION_MONTHS, or None when everything is kept."""
+    if settings.AUDIT_RETENTION_MONTHS <= 0:
+        return None
+    current = month_key(now or datetime.now(timezone.utc))
+    return _shift_month(current, -(settings.AUDIT_RETENTION_MONTHS - 1))
+
+
+def drop_expired_partitions(conn: Connection, now: Optional[datetime] = None) -> list[str]:
+    """Drop months older than AUDIT_RETENTION_MONTHS (0 keeps everything)."""
+    oldest_kept = oldest_kept_month(now)
+    if oldest_kept is None:
+        return []
+
+    dropped = [key for key in list_partitions(conn) if key < oldest_kept]
+    for key in dropped:
+        partition_table(key).drop(conn)
+        with _lock:
+            _ensured.discard(key)
+    return dropped
+
+
+def apply_retention(bind: Engine) -> list[str]:
+    """Drop expired months in a transaction of their own; run periodically,
+    off the request path, as a large month can take a while to drop."""
+    with bind.begin() as conn:
+        return drop_expired_partitions(conn)
+
+
+def write_rows(conn: Connection, rows: Iterable[dict[str, Any]]) -> set[str]:
+    """Insert audit rows into their month partitions, one executemany per month,
+    and add them to the daily counts in the same transaction.
+
+    Rows dated before the retention window are counted but not stored.
+    Returns the months written to; hand them to `partitions_committed` once
+    the transaction has committed.
+    """
+    oldest_kept = oldest_kept_month()
+    by_month: dict[str, list[dict[str, Any]]] = {}
+    counts: Counter = Counter()
+    for row in rows:
+        key = month_key(row["created_at"])
+        counts[(_utc_day(row["created_at"]), row["user_id"], row["action"])] += 1
+        if oldest_kept is not None and key < oldest_kept:
+            logger.warning("Discarding audit entry %r dated before the retention window", row["action"])
+            continue
+        by_month.setdefault(key, []).append(row)
+
+    stored = sum(len(month_rows) for month_rows in by_month.values())
+    if stored:
+        next_id = _allocate_ids(conn, stored)
+        for key, month_rows in by_month.items():
+            month_rows = [dict(row, id=next_id + offset) for offset, row in enumerate(month_rows)]
+            next_id += len(month_rows)
+            conn.execute(insert(ensure_partition(conn, key)), month_rows)
+
+    if counts:
+        conn.execute(_count_upsert(), [
+            {"day": day, "user_id": user_id, "action": action, "entries": entries}
+            for (day, user_id, action), entries in counts.items()
+        ])
+    return set(by_month)
+
+
+def _utc_day(value: datetime) -> date:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+def _count_upsert():
+    statement = sqlite_insert(AuditDailyCount)
+    return statement.on_conflict_do_update(
+        index_elements=["day", "user_id", "action"],
+        set_={"entries": AuditDailyCount.entries + statement.excluded.entries}
+    )
+
+
+def backfill_daily_counts(conn: Connection) -> None:
+    """Build the daily counts from existing partitions when the table is new."""
+    if conn.execute(text(f"SELECT 1 FROM {AuditDailyCount.__tablename__} LIMIT 1")).first():
+        return
+    for key in list_partitions(conn):
+        conn.execute(text(
+            f"INSERT INTO {AuditDailyCount.__tablename__} (day, user_id, action, entries) "
+            f"SELECT date(created_at), user_id, action, COUNT(*) FROM {BASE_TABLE}_{key} "
+            "GROUP BY date(created_at), user_id, action"
+        ))
+
+
+def migrate_unpartitioned_rows(conn: Connection) -> None:
+    """Move rows from the pre-partitioning `audit_logs` table into month tables."""
+    months = conn.execute(text(
+        f"SELECT DISTINCT strftime('%Y%m', created_at) FROM {BASE_TABLE} ORDER BY 1"
+    )).scalars().all()
+    columns = ", ".join(_WRITABLE_COLUMNS)
+    for key in months:
+        table = ensure_partition(conn, key)
+        conn.execute(text(
+            f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {BASE_TABLE} "
+            f"WHERE strftime('%Y%m', created_at) = :key"
+        ), {"key": key})
+    if months:
+        conn.execute(text(f"DELETE FROM {BASE_TABLE}"))
+
+
+def forget_partitions() -> None:
+    """Re-check table existence on the next write; call after a failed write."""
+    with _lock:
+        _ensured.clear()
+
+
+def _confirm_on_commit(session: SASession) -> None:
+    keys = session.info.pop(PENDING_PARTITIONS_KEY, None)
+    if keys:
+        partitions_committed(keys)
+
+
+def _discard_on_rollback(session: SASession) -> None:
+    session.info.pop(PENDING_PARTITIONS_KEY, None)
+
+
+event.listen(SASession, "after_commit", _confirm_on_commit)
+event.listen(SASession, "after_rollback", _discard_on_rollback)
@@ -0,0 +1,151 @@
+import codecs
+import hashlib
+import mmap
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, Optional
+
+from app.core.config import settings
+
+
+class BlobStore:
+    """Content-addressed file store for large document bodies.
+
+    A blob lives at `<root>/<sha256[:2]>/<sha256>` and is never modified,
+    so documents and versions with the same content share one file. Every
+    write refreshes the file's mtime, which `collect_garbage` relies on.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    def size(self, digest: str) -> int:
+        return os.path.getsize(self.path(digest))
+
+    def put_stream(self, chunks: Iterable[bytes]) -> tuple[str, int]:
+        """Write chunks to the store; returns (sha256, size).
+
+        Raises ValueError if the data is not valid UTF-8 text.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        digest = hashlib.sha256()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        size = 0
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                for chunk in chunks:
+                    decoder.decode(chunk)
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+                decoder.decode(b"", final=True)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+
+            hexdigest = digest.hexdigest()
+            final_path = self.path(hexdigest)
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(tmp_path, final_path)
+            return hexdigest, size
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def put_bytes(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        try:
+            # about to be referenced again: keep it out of the next sweep
+            os.utime(self.path(digest))
+        except FileNotFoundError:
+            self.put_stream([data])
+        return digest
+
+    def collect_garbage(
+            self,
+            referenced: Callable[[list[str]], set[str]],
+            min_age: float,
+            batch_size: int = 500
+    ) -> int:
+        """Delete blobs untouched for `min_age` seconds that are not referenced.
+
+        `referenced` gets a batch of digests and returns those still in use.
+        A blob that an in-flight request is writing or re-using has a fresh
+        mtime, so it is never old enough to be considered. Leftover temp
+        files from interrupted uploads are removed too. Returns the number
+        of files deleted.
+        """
+        if not os.path.isdir(self.root):
+            return 0
+        cutoff = time.time() - min_age
+        removed = 0
+        candidates: list[str] = []
+        for entry in os.scandir(self.root):
+            if entry.is_file() and entry.name.startswith(".upload-"):
+                if entry.stat().st_mtime < cutoff:
+                    removed += self._remove_if_stale(entry.path, cutoff)
+            elif entry.is_dir() and len(entry.name) == 2:
+                for blob in os.scandir(entry.path):
+                    if blob.is_file() and blob.stat().st_mtime < cutoff:
+                        candidates.append(blob.name)
+                    if len(candidates) >= batch_size:
+                        removed += self._remove_unreferenced(candidates, referenced, cutoff)
+                        candidates = []
+        if candidates:
+            removed += self._remove_unreferenced(candidates, referenced, cutoff)
+        return removed
+
+    def _remove_unreferenced(self, digests: list[str], referenced: Callable[[list[str]], set[str]], cutoff: float) -> int:
+        in_use = referenced(digests)
+        return sum(self._remove_if_stale(self.path(digest), cutoff) for digest in digests if digest not in in_use)
+
+    def _remove_if_stale(self, path: str, cutoff: float) -> int:
+        # re-check right before deleting: a write may have touched it meanwhile
+        try:
+            if os.stat(path).st_mtime >= cutoff:
+                return 0
+            os.remove(path)
+            return 1
+        except FileNotFoundError:
+            return 0
+
+    @contextmanager
+    def open_mapped(self, digest: str) -> Iterator[Optional[mmap.mmap]]:
+        """Memory-map a blob read-only; yields None for an empty blob."""
+        with open(self.path(digest), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield None
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+
+    def iter_range(self, digest: str, start: int, end: int, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Yield bytes [start, end] (inclusive) without reading the whole blob."""
+        with self.open_mapped(digest) as mapped:
+            if mapped is None:
+                return
+            position = start
+            while position <= end:
+                stop = min(position + chunk_size, end + 1)
+                yield mapped[position:stop]
+                position = stop
+
+    def read_text(self, digest: str, max_bytes: Optional[int] = None) -> str:
+        """Decode a blob, or only its first max_bytes (minus any split character)."""
+        with open(self.path(digest), "rb") as f:
+            if max_bytes is None:
+                return f.read().decode("utf-8")
+            return codecs.getincrementaldecoder("utf-8")().decode(f.read(max_bytes))
+
+
+blob_store = BlobStore(settings.BLOB_STORE_PATH)
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """Bounded, thread-safe LRU cache whose entries expire after a TTL.
+
+    Sync handlers run in the AnyIO threadpool, so every access goes through
+    a lock. `hits` and `misses` are kept so the savings can be observed.
+    With a `weigher`, entries are also evicted while their total weight
+    exceeds `maxweight`, and a single entry heavier than that is not kept.
+    """
+
+    def __init__(
+            self,
+            maxsize: int = 1024,
+            ttl: float = 60.0,
+            maxweight: Optional[int] = None,
+            weigher: Optional[Callable[[Any], int]] = None
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxweight = maxweight
+        self.weigher = weigher
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple[Any, float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _pop(self, key: Hashable) -> None:
+        item = self._data.pop(key, None)
+        if item is not None:
+            self.weight -= item[2]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[1] <= now:
+                if item is not None:
+                    self._pop(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        weight = self.weigher(value) if self.weigher is not None else 0
+        if self.maxweight is not None and weight > self.maxweight:
+            return
+        with self._lock:
+            self._pop(key)
+            self._data[key] = (value, time.monotonic() + ttl, weight)
+            self.weight += weight
+            while len(self._data) > self.maxsize or (
+                    self.maxweight is not None and self.weight > self.maxweight):
+                self._pop(next(iter(self._data)))
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.weight = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "weight": self.weight,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -1,3 +1,4 @@
+from typing import Literal
 from pydantic_settings import BaseSettings
 from functools import lru_cache 
 
@@ -16,6 +17,51 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
+    #Document content
+    BLOB_STORE_PATH: str = ".blobs"
+    BLOB_THRESHOLD_BYTES: int = 256 * 1024
+    DOCUMENT_MAX_BYTES: int = 256 * 1024 * 1024
+    # unreferenced blobs are swept this often, once untouched for as long
+    BLOB_GC_INTERVAL_SECONDS: int = 3600
+    # blob-backed documents are full-text indexed up to this many bytes
+    SEARCH_INDEX_MAX_BYTES: int = 1024 * 1024
+
+    #Document versions
+    VERSION_KEYFRAME_INTERVAL: int = 20
+    # versions longer than this are refused by the diff endpoint
+    DIFF_MAX_LINES: int = 50000
+
+    #Bulk operations
+    BULK_MAX_ITEMS: int = 200
+    TRANSFER_BATCH_SIZE: int = 1000
+    TRANSFER_MAX_BYTES: int = 1024 * 1024 * 1024
+
+    #Audit log
+    # sync: committed with the audited change; async: queued and batch-inserted
+    AUDIT_DURABILITY: Literal["sync", "async"] = "sync"
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AUDIT_QUEUE_SIZE: int = 10000
+    # months of audit partitions to keep, current month included; 0 keeps all
+    AUDIT_RETENTION_MONTHS: int = 0
+    # expired months are dropped this often, outside any request
+    AUDIT_RETENTION_INTERVAL_SECONDS: int = 3600
+
+    #Password hashing pool
+    PASSWORD_POOL_WORKERS: int = 4
+    PASSWORD_POOL_QUEUE_SIZE: int = 32
+
+    #Caches
+    PRINCIPAL_CACHE_SIZE: int = 4096
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    TOKEN_CACHE_SIZE: int = 4096
+    TOKEN_CACHE_TTL_SECONDS: int = 300
+    PERMISSION_CACHE_SIZE: int = 16384
+    PERMISSION_CACHE_TTL_SECONDS: int = 300
+    DIFF_CACHE_SIZE: int = 256
+    DIFF_CACHE_TTL_SECONDS: int = 3600
+    DIFF_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
     class Config:
         env_file = ".env"
         env_file_encoding = "UTF-8"
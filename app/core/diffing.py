@@ -0,0 +1,168 @@
+from bisect import bisect_left
+from collections import Counter
+from difflib import Match, SequenceMatcher
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.schemas.document_version import DocumentVersionDiffChange
+
+
+# gaps without unique anchor lines fall back to difflib only below this many
+# line pairs; larger ones are reported as a single replacement
+FALLBACK_MAX_PAIRS = 250_000
+
+
+# version rows never change, so a computed diff stays valid until evicted;
+# entries are weighed by their text so the cache is bounded in size, not count
+diff_cache = TTLCache(
+    maxsize=settings.DIFF_CACHE_SIZE,
+    ttl=settings.DIFF_CACHE_TTL_SECONDS,
+    maxweight=settings.DIFF_CACHE_MAX_BYTES,
+    weigher=lambda diff: 2 * len(diff.unified)
+)
+
+
+def _intern(lines: list[str], table: dict[str, int]) -> list[int]:
+    # equal lines share one id, so the matcher compares and hashes small ints
+    return [table.setdefault(line, len(table)) for line in lines]
+
+
+def _unique_anchors(a: list[int], alo: int, ahi: int, b: list[int], blo: int, bhi: int) -> list[tuple[int, int]]:
+    """Longest increasing run of lines that occur exactly once on each side."""
+    count_a = Counter(a[alo:ahi])
+    count_b = Counter(b[blo:bhi])
+    position_b = {b[j]: j for j in range(blo, bhi) if count_b[b[j]] == 1}
+    pairs = [
+        (i, position_b[a[i]])
+        for i in range(alo, ahi)
+        if count_a[a[i]] == 1 and a[i] in position_b
+    ]
+
+    # patience sorting: tails[k] is the smallest b position ending a run of k + 1
+    tails: list[int] = []
+    tail_index: list[int] = []
+    previous: list[int] = []
+    for index, (_, j) in enumerate(pairs):
+        k = bisect_left(tails, j)
+        if k == len(tails):
+            tails.append(j)
+            tail_index.append(index)
+        else:
+            tails[k] = j
+            tail_index[k] = index
+        previous.append(tail_index[k - 1] if k else -1)
+
+    anchors = []
+    index = tail_index[-1] if tail_index else -1
+    while index >= 0:
+        anchors.append(pairs[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+
+class _PatienceMatcher(SequenceMatcher):
+    """SequenceMatcher whose matching blocks come from a patience diff.
+
+    Lines unique to both sides anchor the match and the gaps between them
+    are diffed recursively, which stays near-linear where difflib's longest
+    common block search does not. Opcodes and grouping are inherited.
+    """
+
+    def get_matching_blocks(self) -> list[Match]:
+        if self.matching_blocks is not None:
+            return self.matching_blocks
+
+        a, b = self.a, self.b
+        blocks: list[tuple[int, int]] = []
+        stack = [(0, len(a), 0, len(b))]
+        while stack:
+            alo, ahi, blo, bhi = stack.pop()
+            while alo < ahi and blo < bhi and a[alo] == b[blo]:
+                blocks.append((alo, blo))
+                alo += 1
+                blo += 1
+            while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+                ahi -= 1
+                bhi -= 1
+                blocks.append((ahi, bhi))
+            if alo == ahi or blo == bhi:
+                continue
+
+            anchors = _unique_anchors(a, alo, ahi, b, blo, bhi)
+            if anchors:
+                for i, j in anchors:
+                    blocks.append((i, j))
+                    stack.append((alo, i, blo, j))
+                    alo, blo = i + 1, j + 1
+                stack.append((alo, ahi, blo, bhi))
+            elif (ahi - alo) * (bhi - blo) <= FALLBACK_MAX_PAIRS:
+                fallback = SequenceMatcher(None, a[alo:ahi], b[blo:bhi], autojunk=False)
+                for i, j, size in fallback.get_matching_blocks():
+                    blocks.extend((alo + i + k, blo + j + k) for k in range(size))
+
+        # single matched lines, merged into maximal runs as difflib reports them
+        blocks.sort()
+        merged: list[Match] = []
+        for i, j in blocks:
+            if merged and merged[-1].a + merged[-1].size == i and merged[-1].b + merged[-1].size == j:
+                last = merged[-1]
+                merged[-1] = Match(last.a, last.b, last.size + 1)
+            else:
+                merged.append(Match(i, j, 1))
+        merged.append(Match(len(a), len(b), 0))
+        self.matching_blocks = merged
+        return merged
+
+
+def _range(start: int, stop: int) -> str:
+    # unified diff ranges are 1-based; an empty range points at the line before it
+    length = stop - start
+    if length == 1:
+        return str(start + 1)
+    return f"{start + 1 if length else start},{length}"
+
+
+def compute_diff(
+        old: str,
+        new: str,
+        from_label: str,
+        to_label: str,
+        context: int = 3
+) -> tuple[list[DocumentVersionDiffChange], str]:
+    """Line diff of two texts as (structured changes, unified diff text)."""
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+
+    table: dict[str, int] = {}
+    matcher = _PatienceMatcher(None, _intern(old_lines, table), _intern(new_lines, table), autojunk=False)
+
+    changes = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        changes.append(DocumentVersionDiffChange(
+            op=tag,
+            old_start=i1,
+            old_end=i2,
+            new_start=j1,
+            new_end=j2,
+            old_lines=old_lines[i1:i2],
+            new_lines=new_lines[j1:j2]
+        ))
+
+    if not changes:
+        return changes, ""
+
+    out = [f"--- {from_label}\n", f"+++ {to_label}\n"]
+    for group in matcher.get_grouped_opcodes(context):
+        first, last = group[0], group[-1]
+        out.append(f"@@ -{_range(first[1], last[2])} +{_range(first[3], last[4])} @@\n")
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                out.extend(" " + line for line in old_lines[i1:i2])
+                continue
+            out.extend("-" + line for line in old_lines[i1:i2])
+            out.extend("+" + line for line in new_lines[j1:j2])
+    unified = "".join(line if line.endswith("\n") else line + "\n\\ No newline at end of file\n" for line in out)
+    return changes, unified
@@ -0,0 +1,40 @@
+from typing import Callable, Iterable, Iterator
+
+from pydantic import BaseModel
+from sqlalchemy import Engine
+from sqlmodel import Session
+
+# response bodies are sent in chunks of about this size, not line by line
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+def ndjson_lines(records: Iterable[BaseModel]) -> Iterator[str]:
+    for record in records:
+        yield record.model_dump_json() + "\n"
+
+
+def chunked(lines: Iterable[str]) -> Iterator[bytes]:
+    """Encode text lines and regroup them into EXPORT_CHUNK_SIZE byte chunks."""
+    buffer = bytearray()
+    for line in lines:
+        buffer += line.encode("utf-8")
+        if len(buffer) >= EXPORT_CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def stream_lines(bind: Engine, produce: Callable[[Session], Iterable[str]]) -> Iterator[bytes]:
+    """Lazy response body of the lines `produce` yields from a session of its own.
+
+    The request session may be closed before a StreamingResponse body is
+    sent, so the rows are read through a new session that lives exactly as
+    long as the stream. Check access before calling; nothing runs until the
+    first chunk is requested.
+    """
+    def lines() -> Iterator[str]:
+        with Session(bind) as session:
+            yield from produce(session)
+
+    return chunked(lines())
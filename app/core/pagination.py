@@ -0,0 +1,56 @@
+import base64
+import json
+from typing import Any, Callable, Optional, Sequence
+
+from fastapi import HTTPException, Response, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: dict[str, Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[dict[str, Any]]:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        values = None
+
+    if not isinstance(values, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return values
+
+
+def cursor_value(values: Optional[dict[str, Any]], key: str, cast: Callable[[Any], Any] = int) -> Any:
+    if values is None:
+        return None
+    try:
+        return cast(values[key])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def set_next_cursor(
+        response: Response,
+        items: Sequence[Any],
+        limit: Optional[int],
+        key: Callable[[Any], dict[str, Any]]
+) -> None:
+    """Expose the cursor for the page after `items` in the X-Next-Cursor header.
+
+    List bodies stay plain JSON arrays for existing clients; a short page
+    means there is nothing more, so no header is sent.
+    """
+    if limit is not None and items and len(items) >= limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(key(items[-1]))
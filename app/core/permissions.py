@@ -1,28 +1,133 @@
-from typing import Optional
+from typing import Iterable, Optional
+from sqlalchemy import and_, event, inspect
+from sqlalchemy.orm import Session as SASession, object_session
 from sqlmodel import Session, select
 
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.models.project import Project
 from app.models.project_access import Permission, ProjectAccess
 from app.models.user import User, UserRole
 
+# project_id -> {user_id: resolved Permission or _NO_ACCESS}. Keyed by project
+# so one pop drops every user's entry; a reader takes the project's dict
+# before querying, so an invalidation that lands mid-query orphans the dict
+# and the stale result is never visible.
+permission_cache = TTLCache(
+    maxsize=settings.PERMISSION_CACHE_SIZE,
+    ttl=settings.PERMISSION_CACHE_TTL_SECONDS
+)
+_NO_ACCESS = object()
+
+# projects whose permissions the session's open transaction changed
+_CHANGED_PROJECTS_KEY = "changed_project_permissions"
+
+
+def invalidate_project_permissions(project_id: int) -> None:
+    """Drop cached permissions for a project; changes made through a session
+    are invalidated automatically when it commits."""
+    permission_cache.invalidate(project_id)
+
+
+def _project_entry(project_id: int) -> dict:
+    entry = permission_cache.get(project_id)
+    if entry is None:
+        entry = {}
+        permission_cache.set(project_id, entry)
+    return entry
+
+
+def _mark_changed(target, project_id: int) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_CHANGED_PROJECTS_KEY, set()).add(project_id)
+
+
+def _on_project_change(mapper, connection, target) -> None:
+    _mark_changed(target, target.id)
+
+
+def _on_project_update(mapper, connection, target) -> None:
+    # only the owner decides permissions; title edits leave the cache alone
+    if inspect(target).attrs.owner_id.history.has_changes():
+        _mark_changed(target, target.id)
+
+
+def _on_access_change(mapper, connection, target) -> None:
+    _mark_changed(target, target.project_id)
+
+
+def _invalidate_after_commit(session: SASession) -> None:
+    for project_id in session.info.pop(_CHANGED_PROJECTS_KEY, ()):
+        invalidate_project_permissions(project_id)
+
+
+for _event in ("after_insert", "after_delete"):
+    event.listen(Project, _event, _on_project_change)
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(ProjectAccess, _event, _on_access_change)
+event.listen(Project, "after_update", _on_project_update)
+# a rolled-back transaction may still have cached what it saw uncommitted
+event.listen(SASession, "after_commit", _invalidate_after_commit)
+event.listen(SASession, "after_rollback", _invalidate_after_commit)
+
+
+# keeps IN (...) lists under SQLite's bound-parameter limit
+_IN_CHUNK_SIZE = 500
+
+
+def get_user_project_permissions(session: Session, user: User, project_ids: Iterable[int]) -> dict[int, Permission]:
+    """Resolve the user's permission on many projects at once.
+
+    Returns a map containing only existing projects the user can access
+    (admins: every existing project), so a hit also proves the project
+    exists. Cache misses are resolved with one owner/access outer-join
+    query per chunk of ids, instead of two queries per project.
+
+    Meant for a known set of ids (bulk document edits, single checks).
+    Paginated listings such as ProjectService.list_projects and
+    SearchService filter by access inside their own SQL instead, since the
+    rows a user cannot see must be gone before LIMIT/OFFSET apply.
+    """
+    project_ids = set(project_ids)
+    result: dict[int, Permission] = {}
+    missing = []
+    entries: dict[int, dict] = {}
+    for project_id in project_ids:
+        entry = entries[project_id] = _project_entry(project_id)
+        cached = entry.get(user.id)
+        if cached is None:
+            missing.append(project_id)
+        elif cached is not _NO_ACCESS:
+            result[project_id] = cached
+
+    for start in range(0, len(missing), _IN_CHUNK_SIZE):
+        chunk = missing[start:start + _IN_CHUNK_SIZE]
+        statement = (
+            select(Project.id, Project.owner_id, ProjectAccess.permission)
+            .outerjoin(ProjectAccess, and_(
+                ProjectAccess.project_id == Project.id,
+                ProjectAccess.user_id == user.id
+            ))
+            .where(Project.id.in_(chunk))
+        )
+        resolved: dict[int, Permission] = {}
+        for project_id, owner_id, permission in session.exec(statement).all():
+            if user.role == UserRole.admin or owner_id == user.id:
+                resolved[project_id] = Permission.editor
+            elif permission is not None:
+                resolved[project_id] = permission
+
+        for project_id in chunk:
+            permission = resolved.get(project_id)
+            entries[project_id][user.id] = _NO_ACCESS if permission is None else permission
+        result.update(resolved)
+
+    return result
+
+
 def get_user_project_permission(session: Session, user: User, project_id: int) -> Optional[Permission]:
-    if user.role == UserRole.admin:
-        return Permission.editor
-    
-    project = session.get(Project, project_id)
-    if project and project.owner_id == user.id:
-        return Permission.editor
-    
-    statement = select(ProjectAccess).where(
-        ProjectAccess.project_id == project_id,
-        ProjectAccess.user_id == user.id
-    )
-    access = session.exec(statement).first()
-    
-    if access:
-        return access.permission
-    
-    return None
+    return get_user_project_permissions(session, user, [project_id]).get(project_id)
 
 def can_view_project(session: Session, user: User, project_id: int) -> bool:
     permission = get_user_project_permission(session, user, project_id)
@@ -0,0 +1,73 @@
+from typing import Optional
+
+from sqlalchemy import Connection, event, inspect, text
+
+from app.core.blob_store import blob_store
+from app.core.config import settings
+from app.models.document import Document
+
+
+SEARCH_TABLE = "documents_fts"
+
+# rowid is the document id; title and content are tokenized separately so
+# bm25() can weigh a title hit above a body hit
+_CREATE_SEARCH_TABLE = (
+    f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+    "title, content, tokenize = 'unicode61 remove_diacritics 2')"
+)
+
+
+def _document_text(content: Optional[str], content_blob: Optional[str]) -> str:
+    # only a prefix of large content is indexed, so a flush never pulls a
+    # whole multi-megabyte blob into memory
+    if content_blob is not None:
+        return blob_store.read_text(content_blob, settings.SEARCH_INDEX_MAX_BYTES)
+    return content or ""
+
+
+def create_search_index(conn: Connection) -> bool:
+    """Create the FTS5 table if it is missing; returns True when it was created."""
+    if inspect(conn).has_table(SEARCH_TABLE):
+        return False
+    conn.execute(text(_CREATE_SEARCH_TABLE))
+    return True
+
+
+def rebuild_search_index(conn: Connection) -> None:
+    conn.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+    rows = conn.execute(text("SELECT id, title, content, content_blob FROM documents"))
+    for document_id, title, content, content_blob in rows:
+        index_document(conn, document_id, title, _document_text(content, content_blob))
+
+
+def index_document(conn: Connection, document_id: int, title: str, content: str) -> None:
+    conn.execute(
+        text(f"INSERT OR REPLACE INTO {SEARCH_TABLE} (rowid, title, content) VALUES (:id, :title, :content)"),
+        {"id": document_id, "title": title, "content": content}
+    )
+
+
+def remove_document(conn: Connection, document_id: int) -> None:
+    conn.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :id"), {"id": document_id})
+
+
+def _index_on_write(mapper, connection, target: Document) -> None:
+    index_document(connection, target.id, target.title, _document_text(target.content, target.content_blob))
+
+
+def _reindex_on_update(mapper, connection, target: Document) -> None:
+    # status/version-only updates leave the indexed text untouched
+    attrs = inspect(target).attrs
+    if any(attrs[name].history.has_changes() for name in ("title", "content", "content_blob")):
+        _index_on_write(mapper, connection, target)
+
+
+def _remove_on_delete(mapper, connection, target: Document) -> None:
+    remove_document(connection, target.id)
+
+
+# index rows are written on the flush connection, so they commit or roll
+# back together with the document change
+event.listen(Document, "after_insert", _index_on_write)
+event.listen(Document, "after_update", _reindex_on_update)
+event.listen(Document, "after_delete", _remove_on_delete)
@@ -1,3 +1,7 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
@@ -5,14 +9,30 @@ import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
+from sqlalchemy import event
+from sqlalchemy.orm import Session as SASession, make_transient_to_detached, object_session
 from sqlmodel import Session, select
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.db.session import get_session
+from app.models.user import User
 
 
 bearer_scheme = HTTPBearer()
 
+# user_id -> column values of the User row; saves the users-table lookup on every request
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+# raw bearer token -> verified payload; an entry never outlives the token's own exp
+token_cache = TTLCache(
+    maxsize=settings.TOKEN_CACHE_SIZE,
+    ttl=settings.TOKEN_CACHE_TTL_SECONDS
+)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(
@@ -24,7 +44,60 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     salt = bcrypt.gensalt()
     hashed = bcrypt.hashpw(password.encode("utf-8"), salt)
-    return hashed 
+    return hashed.decode("utf-8")
+
+
+class PasswordWorkerPool:
+    """Dedicated threads for bcrypt work, kept off the shared AnyIO threadpool.
+
+    bcrypt releases the GIL, so plain threads run in parallel. Callers await
+    the result on the event loop, so a request waiting for a hash holds no
+    thread at all. At most `max_workers + max_queue` calls may be in flight;
+    anything beyond that is rejected with 503 straight away instead of
+    queueing behind a login storm.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="password"
+                )
+            return self._executor
+
+    async def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent password operations, try again later",
+                headers={"Retry-After": "1"}
+            )
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+password_pool = PasswordWorkerPool(
+    max_workers=settings.PASSWORD_POOL_WORKERS,
+    max_queue=settings.PASSWORD_POOL_QUEUE_SIZE
+)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -47,21 +120,82 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 def decode_access_token(token: str) -> Optional[dict]:
+    cached = token_cache.get(token)
+    if cached is not None:
+        # re-check exp: the cache clock is monotonic, the token's is wall time
+        if cached.get("exp", 0) > time.time():
+            return dict(cached)
+        token_cache.invalidate(token)
+        return None
+
     try:
         payload = jwt.decode(
             token, 
             settings.JWT_SECRET, 
             algorithms=[settings.JWT_ALGORITHM]
         )
-        return payload
     except JWTError:
         return None
+
+    exp = payload.get("exp")
+    if exp is not None:
+        token_cache.set(token, payload, ttl=exp - time.time())
+    return dict(payload)
+
+
+# users the session's open transaction changed
+_CHANGED_USERS_KEY = "changed_principals"
+
+
+def invalidate_principal(user_id: int) -> None:
+    """Drop a cached principal; changes made through a session are
+    invalidated automatically when it commits."""
+    principal_cache.invalidate(user_id)
+
+
+def _mark_user_changed(mapper, connection, target) -> None:
+    # role or is_active may have changed anywhere in the codebase; evicting
+    # now, before commit, would let a concurrent request re-cache the old row
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_CHANGED_USERS_KEY, set()).add(target.id)
+
+
+def _invalidate_after_commit(session: SASession) -> None:
+    for user_id in session.info.pop(_CHANGED_USERS_KEY, ()):
+        invalidate_principal(user_id)
+
+
+event.listen(User, "after_update", _mark_user_changed)
+event.listen(User, "after_delete", _mark_user_changed)
+# a rolled-back transaction may still have cached what it saw uncommitted
+event.listen(SASession, "after_commit", _invalidate_after_commit)
+event.listen(SASession, "after_rollback", _invalidate_after_commit)
+
+
+def _load_principal(session: Session, user_id: int) -> Optional[User]:
+    cached = principal_cache.get(user_id)
+    if cached is not None:
+        user = User(**cached)
+        make_transient_to_detached(user)
+        return session.merge(user, load=False)
+
+    user = session.get(User, user_id)
+    if user is not None:
+        principal_cache.set(user_id, user.model_dump())
+    return user
+
     
 def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+    session: Session = Depends(get_session)
 ):
-    from app.models.user import User
+    """Resolve the bearer token to an active user.
 
+    The session comes from the same request-scoped `get_session` dependency
+    that routers and services receive, so FastAPI hands out one session per
+    request and closes it when the response is done.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -79,8 +213,7 @@ def get_current_user(
     if user_id is None:
         raise credentials_exception
     
-    session = next(get_session())
-    user = session.get(User, user_id)
+    user = _load_principal(session, user_id)
 
     if user is None:
             raise credentials_exception
@@ -0,0 +1,25 @@
+from typing import BinaryIO, Optional
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+
+# request bodies up to this size stay in memory, larger ones roll over to disk
+SPOOL_MEMORY_BYTES = 1024 * 1024
+
+
+async def spool_body(request: Request, upload: BinaryIO, max_bytes: Optional[int] = None) -> int:
+    """Copy the request body into a spooled file; returns its size.
+
+    File writes run in the threadpool, so a body that rolls over to disk
+    never blocks the event loop. Bodies above `max_bytes` get a 413.
+    """
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if max_bytes is not None and size > max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Request body exceeds {max_bytes} bytes"
+            )
+        await run_in_threadpool(upload.write, chunk)
+    return size
@@ -0,0 +1,146 @@
+import json
+import zlib
+from difflib import SequenceMatcher
+from typing import Iterable, Optional
+
+from sqlmodel import Session, select, func, or_
+
+from app.core.blob_store import blob_store
+from app.core.config import settings
+from app.models.document_version import DocumentVersion
+
+
+def pack_keyframe(content: str) -> bytes:
+    return zlib.compress(content.encode("utf-8"))
+
+
+def encode_delta(previous: str, content: str) -> bytes:
+    """Line-level delta: [start, end] copies lines of `previous`, a string is inserted text."""
+    old_lines = previous.splitlines(keepends=True)
+    new_lines = content.splitlines(keepends=True)
+
+    ops: list = []
+    matcher = SequenceMatcher(None, old_lines, new_lines)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(new_lines[j1:j2]))
+
+    return zlib.compress(json.dumps(ops, separators=(",", ":")).encode("utf-8"))
+
+
+def apply_delta(previous: str, delta: bytes) -> str:
+    old_lines = previous.splitlines(keepends=True)
+    parts = []
+    for op in json.loads(zlib.decompress(delta)):
+        if isinstance(op, list):
+            parts.extend(old_lines[op[0]:op[1]])
+        else:
+            parts.append(op)
+    return "".join(parts)
+
+
+def decode_payload(
+        payload: Optional[bytes],
+        is_keyframe: bool,
+        previous: Optional[str],
+        legacy_snapshot: str = "",
+        content_blob: Optional[str] = None
+) -> str:
+    if content_blob is not None:
+        return blob_store.read_text(content_blob)
+    if payload is None:
+        # row written before delta storage and not converted yet
+        return legacy_snapshot
+    if is_keyframe:
+        return zlib.decompress(payload).decode("utf-8")
+    return apply_delta(previous or "", payload)
+
+
+class VersionStore:
+    """Delta-encoded version history with a full keyframe every N versions.
+
+    Rebuilding any version replays at most VERSION_KEYFRAME_INTERVAL - 1
+    deltas, all fetched in a single query.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.keyframe_interval = max(settings.VERSION_KEYFRAME_INTERVAL, 1)
+
+    def build(
+            self,
+            document_id: int,
+            version: int,
+            content: str,
+            previous_content: Optional[str],
+            created_by: int,
+            content_blob: Optional[str] = None
+    ) -> DocumentVersion:
+        """Build the row for a new version.
+
+        Pass `content_blob` when the text lives in the blob store: the row
+        then references the blob instead of holding a copy. Pass
+        `previous_content=None` to force a keyframe.
+        """
+        if content_blob is not None:
+            return DocumentVersion(
+                document_id=document_id,
+                version=version,
+                content_snapshot="",
+                is_keyframe=True,
+                content_blob=content_blob,
+                created_by=created_by
+            )
+
+        is_keyframe = previous_content is None or (version - 1) % self.keyframe_interval == 0
+        payload = pack_keyframe(content) if is_keyframe else encode_delta(previous_content, content)
+        return DocumentVersion(
+            document_id=document_id,
+            version=version,
+            content_snapshot="",
+            is_keyframe=is_keyframe,
+            payload=payload,
+            created_by=created_by
+        )
+
+    def load_contents(self, document_id: int, versions: Iterable[int]) -> dict[int, str]:
+        """Rebuild several versions in one pass from the keyframe below the lowest.
+
+        Replays every row up to the highest, so only use it for versions
+        close together; far-apart versions should each use `load_content`.
+        """
+        versions = set(versions)
+        if not versions:
+            return {}
+        lowest, highest = min(versions), max(versions)
+
+        keyframe = select(func.max(DocumentVersion.version)).where(
+            DocumentVersion.document_id == document_id,
+            DocumentVersion.version <= lowest,
+            or_(DocumentVersion.is_keyframe.is_(True), DocumentVersion.payload.is_(None))
+        ).scalar_subquery()
+
+        statement = select(
+            DocumentVersion.version,
+            DocumentVersion.is_keyframe,
+            DocumentVersion.payload,
+            DocumentVersion.content_snapshot,
+            DocumentVersion.content_blob
+        ).where(
+            DocumentVersion.document_id == document_id,
+            DocumentVersion.version >= func.coalesce(keyframe, 1),
+            DocumentVersion.version <= highest
+        ).order_by(DocumentVersion.version, DocumentVersion.id)
+
+        result: dict[int, str] = {}
+        content: Optional[str] = None
+        for version, is_keyframe, payload, snapshot, blob in self.session.exec(statement):
+            content = decode_payload(payload, is_keyframe, content, snapshot, blob)
+            if version in versions:
+                result[version] = content
+        return result
+
+    def load_content(self, document_id: int, version: int) -> Optional[str]:
+        return self.load_contents(document_id, [version]).get(version)
@@ -0,0 +1,130 @@
+from typing import Optional
+from sqlalchemy import Connection, Engine, inspect, text
+from sqlmodel import SQLModel
+
+from app.core.audit_partitions import (
+    add_generated_columns,
+    backfill_daily_counts,
+    create_partition_indexes,
+    drop_expired_partitions,
+    migrate_unpartitioned_rows,
+    seed_sequence
+)
+from app.core.config import settings
+from app.core.search_index import create_search_index, rebuild_search_index
+from app.core.version_store import decode_payload, encode_delta, pack_keyframe
+
+# PRAGMA user_version values: data migrations up to this one are done
+SNAPSHOTS_CONVERTED = 1
+CONVERT_BATCH_DOCUMENTS = 100
+
+
+def _add_column_if_missing(conn: Connection, table: str, column: str, ddl: str) -> bool:
+    inspector = inspect(conn)
+    if not inspector.has_table(table):
+        return False
+    columns = {c["name"] for c in inspector.get_columns(table)}
+    if column in columns:
+        return False
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return True
+
+
+def _create_missing_indexes(conn: Connection) -> None:
+    # create_all() only builds indexes together with a brand new table
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def _convert_version_snapshots(conn: Connection, after_document_id: int, batch_size: int) -> Optional[int]:
+    """Re-encode the full-text version rows of the next `batch_size` documents
+    as keyframes and deltas; returns the last document id done, or None."""
+    interval = max(settings.VERSION_KEYFRAME_INTERVAL, 1)
+    document_ids = conn.execute(text(
+        "SELECT DISTINCT document_id FROM document_versions "
+        "WHERE document_id > :after AND payload IS NULL AND content_blob IS NULL "
+        "ORDER BY document_id LIMIT :limit"
+    ), {"after": after_document_id, "limit": batch_size}).scalars().all()
+
+    for document_id in document_ids:
+        rows = conn.execute(text(
+            "SELECT id, version, is_keyframe, payload, content_snapshot, content_blob FROM document_versions "
+            "WHERE document_id = :document_id ORDER BY version, id"
+        ), {"document_id": document_id}).all()
+
+        previous = None
+        for row_id, version, is_keyframe, payload, snapshot, blob in rows:
+            content = decode_payload(payload, is_keyframe, previous, snapshot, blob)
+            if payload is None and blob is None:
+                keyframe = previous is None or (version - 1) % interval == 0
+                conn.execute(text(
+                    "UPDATE document_versions SET is_keyframe = :is_keyframe, payload = :payload, "
+                    "content_snapshot = '' WHERE id = :id"
+                ), {
+                    "id": row_id,
+                    "is_keyframe": keyframe,
+                    "payload": pack_keyframe(content) if keyframe else encode_delta(previous, content)
+                })
+            previous = content
+    return document_ids[-1] if document_ids else None
+
+
+def _user_version(conn: Connection) -> int:
+    return conn.execute(text("PRAGMA user_version")).scalar()
+
+
+def convert_version_snapshots(engine: Engine) -> None:
+    """One-off conversion of pre-delta version rows, committed per batch of
+    documents; PRAGMA user_version records that it is done."""
+    with engine.connect() as conn:
+        if _user_version(conn) >= SNAPSHOTS_CONVERTED:
+            return
+
+    after = 0
+    while after is not None:
+        with engine.begin() as conn:
+            after = _convert_version_snapshots(conn, after, CONVERT_BATCH_DOCUMENTS)
+
+    with engine.begin() as conn:
+        conn.execute(text(f"PRAGMA user_version = {SNAPSHOTS_CONVERTED}"))
+
+
+def upgrade_schema(conn: Connection) -> None:
+    """Bring tables created by an older release up to the current models.
+
+    Runs after create_all() on every start-up; every step is idempotent.
+    Row conversions too large for one transaction live in their own
+    functions (see convert_version_snapshots).
+    """
+    if _add_column_if_missing(conn, "documents", "current_version", "INTEGER NOT NULL DEFAULT 1"):
+        conn.execute(text(
+            "UPDATE documents SET current_version = COALESCE("
+            "(SELECT MAX(v.version) FROM document_versions v WHERE v.document_id = documents.id), 1)"
+        ))
+
+    _add_column_if_missing(conn, "documents", "content_blob", "VARCHAR(64)")
+    if _add_column_if_missing(conn, "documents", "content_size", "INTEGER NOT NULL DEFAULT 0"):
+        conn.execute(text(
+            "UPDATE documents SET content_size = COALESCE(LENGTH(CAST(content AS BLOB)), 0)"
+        ))
+
+    if _add_column_if_missing(conn, "projects", "created_at", "DATETIME"):
+        conn.execute(text("UPDATE projects SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL"))
+
+    _add_column_if_missing(conn, "document_versions", "is_keyframe", "BOOLEAN NOT NULL DEFAULT 1")
+    _add_column_if_missing(conn, "document_versions", "payload", "BLOB")
+    _add_column_if_missing(conn, "document_versions", "content_blob", "VARCHAR(64)")
+
+    if inspect(conn).has_table("audit_logs"):
+        add_generated_columns(conn)
+        migrate_unpartitioned_rows(conn)
+        backfill_daily_counts(conn)
+        seed_sequence(conn)
+    drop_expired_partitions(conn)
+    create_partition_indexes(conn)
+
+    if create_search_index(conn):
+        rebuild_search_index(conn)
+
+    _create_missing_indexes(conn)
@@ -1,7 +1,9 @@
+from contextlib import contextmanager
 from sqlmodel import SQLModel, Session, create_engine
-from typing import Generator
+from typing import Generator, Iterator
 
 from app.core.config import settings
+from app.db.migrations import convert_version_snapshots, upgrade_schema
 
 engine = create_engine(
     settings.DATABASE_URL,
@@ -12,7 +14,25 @@ engine = create_engine(
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        upgrade_schema(conn)
+    convert_version_snapshots(engine)
 
 def get_session() -> Generator[Session, None, None]:
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+@contextmanager
+def transaction(session: Session) -> Iterator[Session]:
+    """Unit of work: everything written inside the block is committed once.
+
+    Use `session.flush()` inside the block when a generated id is needed.
+    Any exception rolls the whole block back.
+    """
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
@@ -1,18 +1,51 @@
+import asyncio
+import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core.audit import audit_writer
+from app.core.audit_partitions import apply_retention
 from app.core.config import settings
-from app.db.session import create_db_and_tables
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.security import password_pool
+from app.db.session import create_db_and_tables, engine
+from app.services.document_service import collect_blob_garbage
 
-from app.routers import documents, projects, users, auth, access, auditlog
+from app.routers import documents, projects, users, auth, access, auditlog, search
 
+logger = logging.getLogger(__name__)
+
+
+async def collect_blob_garbage_periodically():
+    while True:
+        try:
+            await run_in_threadpool(collect_blob_garbage)
+        except Exception:
+            logger.exception("Blob garbage collection failed")
+        await asyncio.sleep(settings.BLOB_GC_INTERVAL_SECONDS)
+
+
+async def apply_audit_retention_periodically():
+    while True:
+        try:
+            await run_in_threadpool(apply_retention, engine)
+        except Exception:
+            logger.exception("Dropping expired audit log partitions failed")
+        await asyncio.sleep(settings.AUDIT_RETENTION_INTERVAL_SECONDS)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     create_db_and_tables()
+    blob_gc = asyncio.create_task(collect_blob_garbage_periodically())
+    audit_retention = asyncio.create_task(apply_audit_retention_periodically())
     yield
+    blob_gc.cancel()
+    audit_retention.cancel()
+    password_pool.shutdown()
+    audit_writer.shutdown()
 
 
 app = FastAPI(
@@ -48,7 +81,8 @@ def setup_cors_middleware():
         allow_origins=["*"],
         allow_credentials=True,
         allow_methods=["*"],
-        allow_headers=["*"]
+        allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER]
     )
 
 @app.get("/", tags=["Root"])
@@ -74,6 +108,7 @@ def main():
     app.include_router(access.router)
     app.include_router(documents.router)
     app.include_router(auditlog.router)
+    app.include_router(search.router)
 
 main()
 
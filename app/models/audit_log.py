@@ -1,7 +1,8 @@
-from datetime import datetime, timezone
-from typing import Optional, TYPE_CHECKING
+from datetime import date, datetime, timezone
+from typing import Any, Optional, TYPE_CHECKING
 from enum import Enum
 
+from sqlalchemy import JSON, Column, Computed, Index, Integer
 from sqlmodel import SQLModel, Field, Relationship
 
 class EntityType(str, Enum):
@@ -10,20 +11,70 @@ class EntityType(str, Enum):
     document = "document"
     access = "access"
 
+# hot meta keys promoted to virtual columns; for project/user entities the
+# entity itself is the project/user, so entity_id is used
+PROJECT_ID_SQL = "CASE WHEN entity_type = 'project' THEN entity_id ELSE json_extract(meta, '$.project_id') END"
+TARGET_USER_ID_SQL = "CASE WHEN entity_type = 'user' THEN entity_id ELSE json_extract(meta, '$.target_user_id') END"
+
+
 class AuditLog(SQLModel, table=True):
     __tablename__ = "audit_logs"
+    # each /audit filter on its own is an equality prefix followed by the
+    # created_at sort; combined filters walk one of these and check the rest
+    __table_args__ = (
+        Index("ix_audit_logs_user_id_created_at", "user_id", "created_at"),
+        Index("ix_audit_logs_action_created_at", "action", "created_at"),
+        Index("ix_audit_logs_entity_type_created_at", "entity_type", "created_at"),
+        Index("ix_audit_logs_entity_type_entity_id_created_at", "entity_type", "entity_id", "created_at"),
+        Index("ix_audit_logs_project_id_created_at", "project_id", "created_at"),
+        Index("ix_audit_logs_target_user_id_created_at", "target_user_id", "created_at"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="users.id", index=True)
+    user_id: int = Field(foreign_key="users.id")
     action: str = Field(max_length=100)
     entity_type: EntityType
     entity_id: Optional[int] = Field(default=None)
-    meta: Optional[str] = Field(default=None)
-    created_at: datetime = Field(default_factory=datetime.now(timezone.utc), index=True)
+    meta: Optional[dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
+    project_id: Optional[int] = Field(
+        default=None,
+        sa_column=Column(Integer, Computed(PROJECT_ID_SQL, persisted=False))
+    )
+    target_user_id: Optional[int] = Field(
+        default=None,
+        sa_column=Column(Integer, Computed(TARGET_USER_ID_SQL, persisted=False))
+    )
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), index=True)
 
 
     user: "User" = Relationship(back_populates="audit_logs")
 
 
+class AuditLogSequence(SQLModel, table=True):
+    """Single row holding the last audit entry id handed out.
+
+    Ids come from here rather than per-partition AUTOINCREMENT, so they are
+    unique across months even when a late entry lands in an older partition.
+    """
+    __tablename__ = "audit_log_sequence"
+
+    id: int = Field(default=1, primary_key=True)
+    last_id: int = Field(default=0)
+
+
+class AuditDailyCount(SQLModel, table=True):
+    """Number of audit entries per UTC day, user and action.
+
+    Maintained as entries are written, and kept when retention drops the
+    underlying partitions.
+    """
+    __tablename__ = "audit_daily_counts"
+
+    day: date = Field(primary_key=True)
+    user_id: int = Field(primary_key=True)
+    action: str = Field(primary_key=True, max_length=100)
+    entries: int = Field(default=0)
+
+
 if TYPE_CHECKING:
     from app.models.user import User
@@ -18,11 +18,15 @@ class Document(SQLModel, table=True):
     project_id: int = Field(foreign_key="projects.id", index=True)
     title: str = Field(max_length=120, min_length=3)
     content: Optional[str] = Field(default="")
+    # sha256 of content kept in the blob store instead of `content` (large documents)
+    content_blob: Optional[str] = Field(default=None, max_length=64)
+    content_size: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
     status: DocumentStatus = Field(default=DocumentStatus.draft)
+    current_version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
     created_by: int = Field(foreign_key="users.id")
     updated_by: Optional[int] = Field(default=None, foreign_key="users.id")
-    created_at: datetime = Field(default_factory=datetime.now(timezone.utc))
-    updated_at: datetime = Field(default_factory=datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
     project: "Project" = Relationship(back_populates="documents")
 
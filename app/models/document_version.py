@@ -1,18 +1,28 @@
 from datetime import datetime, timezone 
 from typing import Optional, TYPE_CHECKING
 
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 
 
 class DocumentVersion(SQLModel, table=True):
     __tablename__ = "document_versions"
+    __table_args__ = (
+        Index("ix_document_versions_document_id_version", "document_id", "version"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     document_id: int = Field(foreign_key="documents.id", index=True)
     version: int = Field(default=1)
+    # full text for rows written before delta storage; new rows keep it empty
     content_snapshot: str = Field(default="")
+    # zlib-compressed full text when is_keyframe, else a delta against version - 1
+    is_keyframe: bool = Field(default=True, sa_column_kwargs={"server_default": "1"})
+    payload: Optional[bytes] = Field(default=None)
+    # keyframe whose text lives in the blob store
+    content_blob: Optional[str] = Field(default=None, max_length=64)
     created_by: int = Field(foreign_key="users.id")
-    created_at: datetime = Field(default_factory=datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 
     document: "Document" = Relationship(back_populates="versions")
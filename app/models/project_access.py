@@ -2,6 +2,7 @@ from datetime import datetime, timezone
 from typing import Optional, TYPE_CHECKING
 from enum import Enum
 
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 
 class Permission(str, Enum):
@@ -12,13 +13,16 @@ class Permission(str, Enum):
 
 class ProjectAccess(SQLModel, table=True):
     __tablename__ = "project_accesses"
+    __table_args__ = (
+        Index("ix_project_accesses_user_id_project_id", "user_id", "project_id"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     project_id: int = Field(foreign_key="projects.id", index=True)
     user_id: int = Field(foreign_key="users.id", index=True)
     permission: Permission = Field(default=Permission.viewer)
     granted_by: int = Field(foreign_key="users.id")
-    created_at: datetime = Field(default_factory=datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
     project: "Project" = Relationship(back_populates="accesses")
 
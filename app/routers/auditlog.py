@@ -1,68 +1,144 @@
 from datetime import datetime, date
-from typing import Optional
-from fastapi import APIRouter, Depends, Query
-from sqlmodel import Session, select
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
 
+from app.core.pagination import cursor_value, decode_cursor, set_next_cursor
 from app.core.security import require_admin
 from app.db.session import get_session
-from app.models.audit_log import AuditLog, EntityType
+from app.models.audit_log import EntityType
 from app.models.user import User
-from app.schemas.audit_log import AuditLogFilter, AuditLogReadWithUser
+from app.schemas.audit_log import AuditLogReadWithUser, AuditStatsBucket
+from app.services.audit_service import EXPORT_CSV, STATS_GROUPS, AuditService
 
 
 router = APIRouter(prefix="/audit", tags=["Audit"])
 
+
+def _decode_audit_cursor(cursor: Optional[str]) -> Optional[tuple[datetime, int]]:
+    after = decode_cursor(cursor)
+    if after is None:
+        return None
+    return cursor_value(after, "created_at", datetime.fromisoformat), cursor_value(after, "id")
+
+
+def _set_audit_cursor(response: Response, logs: list[AuditLogReadWithUser], limit: int) -> None:
+    set_next_cursor(response, logs, limit, lambda log: {
+        "created_at": log.created_at.isoformat(),
+        "id": log.id
+    })
+
+
 @router.get("", response_model=list[AuditLogReadWithUser])
 def list_audit_logs(
+    response: Response,
     date_from: Optional[date] = Query(default=None, description="Filter from date"),
     date_to: Optional[date] = Query(default=None, description="Filter to date"),
     user_id: Optional[int] = Query(default=None, description="Filter by user ID"),
     action: Optional[str] = Query(default=None, description="Filter by action"),
     entity_type: Optional[EntityType] = Query(default=None, description="Filter by entity type"),
+    project_id: Optional[int] = Query(default=None, description="Actions on the project or anything inside it"),
+    target_user_id: Optional[int] = Query(default=None, description="Actions on the user account or its access grants"),
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = Query(default=None, description="Opaque cursor from the X-Next-Cursor header"),
     session: Session = Depends(get_session),
     current_user: User = Depends(require_admin)
 ):
-    statement = select(AuditLogFilter)
-
-    if date_from:
-        dt_from = datetime.combine(date_from, datetime.min.time())
-        statement = statement.where(AuditLog.created_at >= dt_from)
-
-    if date_to:
-        dt_to = datetime.combine(date_to, datetime.max.time())
-        statement = statement.where(AuditLog.created_at <= dt_to)
+    service = AuditService(session)
+    logs = service.list_logs(
+        date_from=date_from,
+        date_to=date_to,
+        user_id=user_id,
+        action=action,
+        entity_type=entity_type,
+        project_id=project_id,
+        target_user_id=target_user_id,
+        skip=skip,
+        limit=limit,
+        after=_decode_audit_cursor(cursor)
+    )
+    _set_audit_cursor(response, logs, limit)
+    return logs
 
-    if user_id:
-        statement = statement.where(AuditLog.user_id == user_id)
-    
-    if action:
-        statement = statement.where(AuditLog.action == action)
-    
-    if entity_type:
-        statement = statement.where(AuditLog.entity_type == entity_type)
-    
-    
-    statement = statement.order_by(AuditLog.created_at.desc())
-    statement = statement.offset(skip).limit(limit)
-
-    logs = session.exec(statement).all()
+@router.get("/export", response_class=StreamingResponse)
+def export_audit_logs(
+    format_: Literal["csv", "ndjson"] = Query(default=EXPORT_CSV, alias="format", description="csv or ndjson"),
+    date_from: Optional[date] = Query(default=None, description="Filter from date"),
+    date_to: Optional[date] = Query(default=None, description="Filter to date"),
+    user_id: Optional[int] = Query(default=None, description="Filter by user ID"),
+    action: Optional[str] = Query(default=None, description="Filter by action"),
+    entity_type: Optional[EntityType] = Query(default=None, description="Filter by entity type"),
+    project_id: Optional[int] = Query(default=None, description="Actions on the project or anything inside it"),
+    target_user_id: Optional[int] = Query(default=None, description="Actions on the user account or its access grants"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(require_admin)
+):
+    """All entries matching the /audit filters, oldest first, streamed in one response."""
+    service = AuditService(session)
+    body = service.export_logs(
+        export_format=format_,
+        date_from=date_from,
+        date_to=date_to,
+        user_id=user_id,
+        action=action,
+        entity_type=entity_type,
+        project_id=project_id,
+        target_user_id=target_user_id
+    )
+    media_type = "text/csv" if format_ == EXPORT_CSV else "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="audit-log.{format_}"'}
+    )
 
+@router.get("/entity/{entity_type}/{entity_id}", response_model=list[AuditLogReadWithUser])
+def entity_history(
+    entity_type: EntityType,
+    entity_id: int,
+    response: Response,
+    date_from: Optional[date] = Query(default=None, description="Filter from date"),
+    date_to: Optional[date] = Query(default=None, description="Filter to date"),
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = Query(default=None, description="Opaque cursor from the X-Next-Cursor header"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(require_admin)
+):
+    """History of one project, document, user or access grant, newest first."""
+    service = AuditService(session)
+    logs = service.list_logs(
+        date_from=date_from,
+        date_to=date_to,
+        entity_type=entity_type,
+        entity_id=entity_id,
+        skip=skip,
+        limit=limit,
+        after=_decode_audit_cursor(cursor)
+    )
+    _set_audit_cursor(response, logs, limit)
+    return logs
 
-    result = []
-    for log in logs:
-        user = session.get(User, log.user_id)
-        result.append(AuditLogReadWithUser(
-            id=log.id,
-            user_id=log.user_id,
-            action=log.action,
-            entity_type=log.entity_type,
-            entity_id=log.entity_id,
-            meta=log.meta,
-            created_at=log.created_at,
-            user_email=user.email if user else None
-        ))
-    
-    return result
+@router.get("/stats", response_model=list[AuditStatsBucket])
+def audit_stats(
+    group_by: str = Query(default="day", description="Comma-separated: day, user, action"),
+    date_from: Optional[date] = Query(default=None, description="Filter from date (UTC)"),
+    date_to: Optional[date] = Query(default=None, description="Filter to date (UTC)"),
+    user_id: Optional[int] = Query(default=None, description="Filter by user ID"),
+    action: Optional[str] = Query(default=None, description="Filter by action"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(require_admin)
+):
+    """Action counts per day, user and/or action, read from the daily rollup."""
+    groups = [name.strip() for name in group_by.split(",") if name.strip()]
+    unknown = set(groups) - set(STATS_GROUPS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown group_by: {', '.join(sorted(unknown))}"
+        )
 
+    service = AuditService(session)
+    return service.stats(groups, date_from, date_to, user_id, action)
@@ -12,7 +12,7 @@ from app.services.user_service import UserService
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-def register_user(
+async def register_user(
     user_data: UserCreate,
     session: Session = Depends(get_session),
     is_admin: bool = Depends(require_admin),
@@ -24,16 +24,16 @@ def register_user(
             detail="Admin access required"
         )
     service = UserService(session)
-    return service.create_user(user_data, current_user)
+    return await service.create_user(user_data, current_user)
 
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     credentials: UserLogin,
     session: Session = Depends(get_session)
 ):
     service = UserService(session)
-    return service.authenticate(credentials)
+    return await service.authenticate(credentials)
 
 
 @router.get("/me", response_model=UserRead)
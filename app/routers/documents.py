@@ -1,53 +1,247 @@
-from fastapi import APIRouter, Depends, status, Query
+import tempfile
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlmodel import Session
-from typing import List
+from typing import List, Literal, Optional
 
+from app.core.blob_store import blob_store
+from app.core.config import settings
+from app.core.http_cache import IMMUTABLE, REVALIDATE, etag_matches, not_modified, set_cache_headers
+from app.core.pagination import cursor_value, decode_cursor, set_next_cursor
 from app.core.security import get_current_user
+from app.core.uploads import SPOOL_MEMORY_BYTES, spool_body
 from app.db.session import get_session
 from app.models.document import DocumentStatus
 from app.models.user import User
-from app.schemas.document import DocumentCreate, DocumentRead, DocumentUpdate
-from app.schemas.document_version import DocumentVersionRead, DocumentVersionReadWithCreator
-from app.services.document_service import DocumentService
+from app.schemas.document import (
+    DOCUMENT_LIST_FIELDS,
+    DocumentBulkCreate,
+    DocumentBulkResult,
+    DocumentBulkStatusChange,
+    DocumentBulkUpdate,
+    DocumentCreate,
+    DocumentRead,
+    DocumentUpdate
+)
+from app.schemas.document_version import DocumentVersionDiff, DocumentVersionRead, DocumentVersionSummary
+from app.services.document_service import DocumentService, document_etag, version_etag
 
 
 router = APIRouter(tags=["Documents"])
 
+
+def get_if_match(
+    if_match: Optional[str] = Header(default=None, description="ETag of the document state the change is based on")
+) -> Optional[str]:
+    return if_match
+
+
+def get_expected_version(
+    expected_version: Optional[int] = Query(
+        default=None,
+        ge=1,
+        description="Content version the change is based on; unlike If-Match it does not cover title or status edits"
+    )
+) -> Optional[int]:
+    return expected_version
+
+
+def _parse_range(range_header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """Parse a single `bytes=` range; None means "send everything".
+
+    As RFC 9110 requires, a malformed range (including last < first) is
+    ignored rather than rejected; only a well-formed range that misses the
+    content gets a 416.
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+
+    start_text, dash, end_text = range_header[len("bytes="):].strip().partition("-")
+    if not dash or not (start_text or end_text):
+        return None
+    if (start_text and not start_text.isdigit()) or (end_text and not end_text.isdigit()):
+        return None
+
+    if start_text:
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+        if end_text and end < start:
+            return None
+    else:
+        suffix = int(end_text)
+        start = max(size - suffix, 0) if suffix else size
+        end = size - 1
+
+    end = min(end, size - 1)
+    if start > end:
+        raise HTTPException(
+            status_code=416,  # Range Not Satisfiable; constant name differs across Starlette versions
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+
 @router.post("/projects/{project_id}/documents",  response_model=DocumentRead,  status_code=status.HTTP_201_CREATED)
 def create_document(project_id: int, doc_data: DocumentCreate, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)
 ):
     service = DocumentService(session)
     return service.create_document(project_id, doc_data, current_user)
 
+@router.post("/projects/{project_id}/documents/bulk", response_model=List[DocumentBulkResult], status_code=status.HTTP_201_CREATED)
+def bulk_create_documents(
+    project_id: int,
+    data: DocumentBulkCreate,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Create many documents in one transaction; all are created or none."""
+    service = DocumentService(session)
+    return service.bulk_create(project_id, data.documents, current_user)
+
+@router.patch("/documents/bulk", response_model=List[DocumentBulkResult])
+def bulk_update_documents(
+    data: DocumentBulkUpdate,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Update many documents in one transaction; each item reports its own status_code."""
+    service = DocumentService(session)
+    return service.bulk_update(data.documents, current_user)
+
+@router.post("/documents/bulk/status", response_model=List[DocumentBulkResult])
+def bulk_change_document_status(
+    data: DocumentBulkStatusChange,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Publish or archive many documents in one transaction; each item reports its own status_code."""
+    service = DocumentService(session)
+    return service.bulk_change_status(data.ids, data.status, current_user)
+
 @router.get("/projects/{project_id}/documents", response_model=list[DocumentRead])
 def list_documents(
     project_id: int,
+    response: Response,
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = Query(default=None, description="Opaque cursor from the X-Next-Cursor header"),
+    fields: Optional[str] = Query(
+        default=None,
+        description="Comma-separated fields to return, e.g. id,title,status; omitted columns are not read"
+    ),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
+    selected = None
+    if fields is not None:
+        selected = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = selected - DOCUMENT_LIST_FIELDS
+        if unknown or not selected:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown)) or '(none given)'}"
+            )
+
     service = DocumentService(session)
-    return service.list_documents(project_id, current_user, skip, limit)
+    after_id = cursor_value(decode_cursor(cursor), "id")
+    documents = service.list_documents(project_id, current_user, skip, limit, after_id, selected)
+    if selected is not None:
+        # sparse rows bypass DocumentRead so deferred columns are never touched
+        rows = [{name: getattr(document, name) for name in selected} for document in documents]
+        response = JSONResponse(content=jsonable_encoder(rows))
+
+    set_next_cursor(response, documents, limit, lambda d: {"id": d.id})
+    return response if selected is not None else documents
 
 @router.get("/documents/{doc_id}", response_model=DocumentRead)
 def get_document(
     doc_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    service = DocumentService(session)
+    if if_none_match:
+        # revalidation never reads the content column
+        etag = service.get_document_etag(doc_id, current_user)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, REVALIDATE)
+
+    document = service.get_document(doc_id, current_user)
+    set_cache_headers(response, document_etag(document.current_version, document.updated_at), REVALIDATE)
+    return document
+
+@router.get("/documents/{doc_id}/content", response_class=StreamingResponse)
+def download_document_content(
+    doc_id: int,
+    range_header: Optional[str] = Header(default=None, alias="Range"),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     service = DocumentService(session)
-    return service.get_document(doc_id, current_user)
+    document = service.get_document(doc_id, current_user)
+
+    inline = None
+    if document.content_blob is None:
+        inline = (document.content or "").encode("utf-8")
+        size = len(inline)
+    else:
+        size = blob_store.size(document.content_blob)
+
+    byte_range = _parse_range(range_header, size)
+    start, end = byte_range if byte_range else (0, size - 1)
+    headers = {"Accept-Ranges": "bytes", "Content-Length": str(end - start + 1)}
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    if inline is not None:
+        body = iter([inline[start:end + 1]])
+    else:
+        body = blob_store.iter_range(document.content_blob, start, end)
+
+    return StreamingResponse(
+        body,
+        status_code=status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK,
+        media_type="text/plain; charset=utf-8",
+        headers=headers
+    )
+
+@router.put("/documents/{doc_id}/content", response_model=DocumentRead)
+async def upload_document_content(
+    doc_id: int,
+    request: Request,
+    expected_version: Optional[int] = Depends(get_expected_version),
+    if_match: Optional[str] = Depends(get_if_match),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Replace the document content with the raw request body (UTF-8 text).
+
+    Bodies above DOCUMENT_MAX_BYTES are rejected with 413.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES) as upload:
+        await spool_body(request, upload, settings.DOCUMENT_MAX_BYTES)
+
+        service = DocumentService(session)
+        return await run_in_threadpool(
+            service.upload_content, doc_id, upload, current_user, expected_version, if_match
+        )
 
 @router.patch("/documents/{doc_id}", response_model=DocumentRead)
 def update_document(
     doc_id: int,
     doc_data: DocumentUpdate,
+    expected_version: Optional[int] = Depends(get_expected_version),
+    if_match: Optional[str] = Depends(get_if_match),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     service = DocumentService(session)
-    return service.update_document(doc_id, doc_data, current_user)
+    return service.update_document(doc_id, doc_data, current_user, expected_version, if_match)
 
 @router.post("/documents/{doc_id}/publish", response_model=DocumentRead)
 def publish_document(
@@ -67,35 +261,68 @@ def archive_document(
     service = DocumentService(session)
     return service.change_status(doc_id, DocumentStatus.archived, current_user)
 
-@router.get("/documents/{doc_id}/versions", response_model=List[DocumentVersionReadWithCreator])
+@router.get("/documents/{doc_id}/versions", response_model=List[DocumentVersionSummary])
 def list_document_versions(
     doc_id: int,
+    response: Response,
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = Query(default=None, description="Opaque cursor from the X-Next-Cursor header"),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     service = DocumentService(session)
-    return service.list_versions(doc_id, current_user)
+    before_version = cursor_value(decode_cursor(cursor), "version")
+    versions = service.list_versions(doc_id, current_user, skip, limit, before_version)
+    set_next_cursor(response, versions, limit, lambda v: {"version": v.version})
+    return versions
 
 @router.get("/documents/{doc_id}/versions/{version}", response_model=DocumentVersionRead)
 def get_document_version(
     doc_id: int,
     version: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    service = DocumentService(session)
+    ver = service.get_version(doc_id, version, current_user)
+    etag = version_etag(ver)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, IMMUTABLE)
+
+    set_cache_headers(response, etag, IMMUTABLE)
+    return service.read_version(ver)
+
+@router.get("/documents/{doc_id}/versions/{from_version}/diff/{to_version}", response_model=DocumentVersionDiff)
+def diff_document_versions(
+    doc_id: int,
+    from_version: int,
+    to_version: int,
+    format_: Literal["unified", "structured"] = Query(default="unified", alias="format"),
+    context: int = Query(default=3, ge=0, le=20, description="Unchanged lines around each hunk"),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     service = DocumentService(session)
-    return service.get_version(doc_id, version, current_user)
+    diff = service.diff_versions(doc_id, from_version, to_version, current_user, context)
+    if format_ == "unified":
+        return diff.model_copy(update={"changes": None})
+    return diff.model_copy(update={"unified": None})
 
 
 @router.post("/documents/{doc_id}/versions/{version}/restore", response_model=DocumentRead)
 def restore_document_version(
     doc_id: int,
     version: int,
+    expected_version: Optional[int] = Depends(get_expected_version),
+    if_match: Optional[str] = Depends(get_if_match),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     service = DocumentService(session)
-    return service.restore_version(doc_id, version, current_user)
+    return service.restore_version(doc_id, version, current_user, expected_version, if_match)
 
 
 
@@ -1,11 +1,20 @@
-from typing import List
-from fastapi import APIRouter, Depends, status, Query
+import tempfile
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, Request, Response, status, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
 
 from app.schemas.project import ProjectCreate, ProjectRead, ProjectUpdate
-from app.services.project_service import ProjectService
+from app.schemas.project_transfer import ProjectImportResult
+from app.services.project_service import ProjectService, project_etag
+from app.services.project_transfer_service import ProjectTransferService
 from app.models.user import User
 from app.db.session import get_session
+from app.core.config import settings
+from app.core.http_cache import REVALIDATE, etag_matches, not_modified, set_cache_headers
+from app.core.uploads import SPOOL_MEMORY_BYTES, spool_body
+from app.core.pagination import cursor_value, decode_cursor, set_next_cursor
 from app.core.security import get_current_user, require_roles
 
 
@@ -16,23 +25,68 @@ def create_project(project_data: ProjectCreate, session: Session = Depends(get_s
     service = ProjectService(session)
     return service.create_project(project_data, current_user)
 
+@router.post("/import", response_model=ProjectImportResult, status_code=status.HTTP_201_CREATED)
+async def import_project(
+    request: Request,
+    title: Optional[str] = Query(default=None, min_length=3, max_length=120, description="Override the exported project title"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(require_roles("admin", "manager"))
+):
+    """Create a new project from an NDJSON export (GET /projects/{id}/export).
+
+    Bodies above TRANSFER_MAX_BYTES are rejected with 413.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES) as upload:
+        await spool_body(request, upload, settings.TRANSFER_MAX_BYTES)
+
+        service = ProjectTransferService(session)
+        return await run_in_threadpool(service.import_project, upload, current_user, title)
+
 @router.get("/", response_model=List[ProjectRead])
-def list_projects( skip: int = Query(default=0, ge=0), limit: int = Query(default=20, ge=1, le=100),
+def list_projects(response: Response, skip: int = Query(default=0, ge=0), limit: int = Query(default=20, ge=1, le=100),
+    after_id: Optional[int] = Query(default=None, ge=0, description="Return projects with id greater than this (keyset cursor)"),
+    cursor: Optional[str] = Query(default=None, description="Opaque cursor from the X-Next-Cursor header"),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)):
 
+    if cursor:
+        after_id = cursor_value(decode_cursor(cursor), "id")
+
     service = ProjectService(session)
-    return service.list_projects(current_user, skip, limit)
+    projects = service.list_projects(current_user, skip, limit, after_id)
+    set_next_cursor(response, projects, limit, lambda p: {"id": p.id})
+    return projects
 
 @router.get("/{project_id}", response_model=ProjectRead)
 def get_project(
     project_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     
     service = ProjectService(session)
-    return service.get_project(project_id, current_user)
+    project = service.get_project(project_id, current_user)
+    etag = project_etag(project)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, REVALIDATE)
+    set_cache_headers(response, etag, REVALIDATE)
+    return project
+
+@router.get("/{project_id}/export", response_class=StreamingResponse)
+def export_project(
+    project_id: int,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream the project, its access grants, documents and every version as NDJSON."""
+    service = ProjectTransferService(session)
+    return StreamingResponse(
+        service.export_project(project_id, current_user),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="project-{project_id}.ndjson"'}
+    )
 
 @router.patch("/{project_id}", response_model=ProjectRead)
 def update_project(
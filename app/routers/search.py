@@ -0,0 +1,24 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session
+
+from app.core.security import get_current_user
+from app.db.session import get_session
+from app.models.user import User
+from app.schemas.document import DocumentSearchResult
+from app.services.search_service import SearchService
+
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+@router.get("/documents", response_model=List[DocumentSearchResult])
+def search_documents(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in title or content; end a word with * for prefix match"),
+    project_id: Optional[int] = Query(default=None, description="Limit the search to one project"),
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=20, ge=1, le=100),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    service = SearchService(session)
+    return service.search_documents(q, current_user, project_id, skip, limit)
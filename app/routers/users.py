@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, HTTPException, Response, status
 from sqlmodel import Session
 
+from app.core.pagination import cursor_value, decode_cursor, set_next_cursor
 from app.core.security import require_admin
 from app.db.session import get_session
 from app.schemas.user import UserRead
@@ -13,8 +15,10 @@ def get_user_service(session: Session = Depends(get_session)) -> UserService:
 
 @router.get("/", response_model=list[UserRead])
 def list_users(
+    response: Response,
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=20, ge=1, le=500),
+    cursor: Optional[str] = Query(default=None, description="Opaque cursor from the X-Next-Cursor header"),
     is_admin: bool = Depends(require_admin),
     service: UserService = Depends(get_user_service)
 ):
@@ -24,4 +28,7 @@ def list_users(
             detail="Admin access required"
         )
     
-    return service.list_users(skip=skip, limit=limit)
\ No newline at end of file
+    after_id = cursor_value(decode_cursor(cursor), "id")
+    users = service.list_users(skip=skip, limit=limit, after_id=after_id)
+    set_next_cursor(response, users, limit, lambda u: {"id": u.id})
+    return users
\ No newline at end of file
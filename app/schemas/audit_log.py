@@ -1,5 +1,5 @@
 from datetime import datetime, date
-from typing import Optional
+from typing import Any, Optional
 from pydantic import BaseModel, Field
 
 from app.models.audit_log import EntityType
@@ -9,7 +9,7 @@ class AuditLogBase(BaseModel):
     action: str
     entity_type: EntityType
     entity_id: Optional[int] = None
-    meta: Optional[str] = None
+    meta: Optional[dict[str, Any]] = None
 
 class AuditLogCreate(AuditLogBase):
         user_id: int
@@ -18,6 +18,8 @@ class AuditLogCreate(AuditLogBase):
 class AuditLogRead(AuditLogBase):
     id: int
     user_id: int
+    project_id: Optional[int] = None
+    target_user_id: Optional[int] = None
     created_at: datetime
     
     class Config:
@@ -28,6 +30,15 @@ class AuditLogReadWithUser(AuditLogRead):
      user_email: Optional[str] = None
 
 
+class AuditStatsBucket(BaseModel):
+    """Entry count for one combination of the requested group_by keys; other keys stay null."""
+    day: Optional[date] = None
+    user_id: Optional[int] = None
+    user_email: Optional[str] = None
+    action: Optional[str] = None
+    count: int
+
+
 class AuditLogFilter(BaseModel):
     date_from: Optional[date] = None
     date_to: Optional[date] = None
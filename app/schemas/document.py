@@ -1,6 +1,8 @@
 from datetime import datetime
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Literal, Optional
+
+from app.core.config import settings
 
 from app.models.document import DocumentStatus
 
@@ -18,10 +20,41 @@ class DocumentUpdate(BaseModel):
     content: Optional[str] = None
 
 
+class DocumentBulkCreate(BaseModel):
+    documents: list[DocumentCreate] = Field(..., min_length=1, max_length=settings.BULK_MAX_ITEMS)
+
+
+class DocumentBulkUpdateItem(DocumentUpdate):
+    id: int
+    expected_version: Optional[int] = Field(None, ge=1, description="Skip this item with 409 unless the document is at this version")
+
+
+class DocumentBulkUpdate(BaseModel):
+    documents: list[DocumentBulkUpdateItem] = Field(..., min_length=1, max_length=settings.BULK_MAX_ITEMS)
+
+
+class DocumentBulkStatusChange(BaseModel):
+    ids: list[int] = Field(..., min_length=1, max_length=settings.BULK_MAX_ITEMS)
+    status: Literal[DocumentStatus.published, DocumentStatus.archived]
+
+
+class DocumentBulkResult(BaseModel):
+    """Outcome of one item of a bulk request, in request order."""
+    index: int
+    id: Optional[int] = None
+    status_code: int
+    detail: Optional[str] = None
+    current_version: Optional[int] = None
+
+
 class DocumentRead(DocumentBase):
+    content: Optional[str] = Field("", description="Null when the content is stored externally (content_blob set); read it from /documents/{id}/content")
     id: int
     project_id: int
     status: DocumentStatus
+    current_version: int
+    content_size: int = 0
+    content_blob: Optional[str] = Field(None, description="Set when content is stored externally; fetch it from /documents/{id}/content")
     created_by: int
     updated_by: Optional[int] = None
     created_at: datetime
@@ -30,6 +63,20 @@ class DocumentRead(DocumentBase):
     class Config:
         from_attributes = True
 
+DOCUMENT_LIST_FIELDS = frozenset(DocumentRead.model_fields)
+
+
+class DocumentSearchResult(BaseModel):
+    id: int
+    project_id: int
+    title: str
+    status: DocumentStatus
+    current_version: int
+    updated_at: datetime
+    snippet: str = Field(..., description="HTML-escaped fragment of the content, hits wrapped in <mark></mark>")
+    score: float = Field(..., description="bm25 relevance; lower is better")
+
+
 class DocumentReadWithDetails(DocumentRead):
     creator_email: Optional[str] = None
     updater_email: Optional[str] = None
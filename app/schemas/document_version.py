@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 from pydantic import BaseModel
 
 class DocumentVersionBase(BaseModel):
@@ -16,5 +16,31 @@ class DocumentVersionRead(DocumentVersionBase):
         from_attributes = True
 
 
-class DocumentVersionReadWithCreator(DocumentVersionRead):
-    creator_email: Optional[str] = None
\ No newline at end of file
+class DocumentVersionSummary(BaseModel):
+    """Version timeline entry; the text is only served by GET /documents/{id}/versions/{version}."""
+    id: int
+    document_id: int
+    version: int
+    created_by: int
+    created_at: datetime
+    creator_email: Optional[str] = None
+
+
+class DocumentVersionDiffChange(BaseModel):
+    op: Literal["replace", "delete", "insert"]
+    old_start: int
+    old_end: int
+    new_start: int
+    new_end: int
+    old_lines: list[str]
+    new_lines: list[str]
+
+
+class DocumentVersionDiff(BaseModel):
+    document_id: int
+    from_version: int
+    to_version: int
+    added: int
+    removed: int
+    unified: Optional[str] = None
+    changes: Optional[list[DocumentVersionDiffChange]] = None
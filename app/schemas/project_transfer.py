@@ -0,0 +1,61 @@
+from datetime import datetime
+from typing import Annotated, Literal, Optional, Union
+from pydantic import BaseModel, Field, TypeAdapter
+
+from app.models.document import DocumentStatus
+from app.models.project_access import Permission
+
+EXPORT_FORMAT_VERSION = 1
+
+
+# One NDJSON line each. Users are referenced by email so an export can be
+# imported into another environment; documents by their id in the source.
+
+class ProjectExportRecord(BaseModel):
+    type: Literal["project"] = "project"
+    format: int = EXPORT_FORMAT_VERSION
+    title: str
+    description: Optional[str] = None
+    owner: Optional[str] = None
+
+
+class AccessExportRecord(BaseModel):
+    type: Literal["access"] = "access"
+    user: str
+    permission: Permission
+    granted_by: Optional[str] = None
+
+
+class DocumentExportRecord(BaseModel):
+    type: Literal["document"] = "document"
+    ref: int
+    title: str
+    status: DocumentStatus
+    created_by: Optional[str] = None
+    updated_by: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class VersionExportRecord(BaseModel):
+    """Full text of one version; the last one of a document is its current content."""
+    type: Literal["version"] = "version"
+    document: int
+    version: int
+    content: str
+    created_by: Optional[str] = None
+    created_at: datetime
+
+
+ExportRecord = TypeAdapter(Annotated[
+    Union[ProjectExportRecord, AccessExportRecord, DocumentExportRecord, VersionExportRecord],
+    Field(discriminator="type")
+])
+
+
+class ProjectImportResult(BaseModel):
+    project_id: int
+    documents: int
+    versions: int
+    accesses: int
+    skipped_users: list[str] = Field(default_factory=list, description="Emails with no account here; their grants were skipped")
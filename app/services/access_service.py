@@ -4,6 +4,7 @@ from fastapi import HTTPException, status
 
 from app.core.audit import log_action
 from app.core.permissions import can_manage_project
+from app.db.session import transaction
 from app.models.audit_log import EntityType
 from app.models.project import Project
 from app.models.project_access import ProjectAccess
@@ -55,40 +56,40 @@ class AccessService:
 
         existing_access = self.get_access(project_id, access_data.user_id)
 
-        if existing_access:
-            existing_access.permission = access_data.permission
-            existing_access.granted_by = granted_by.id
-            self.session.add(existing_access)
-            self.session.commit()
-            self.session.refresh(existing_access)
-            access = existing_access
-            action = "update_access"
-
-        else:
-            # Create new access
-            access = ProjectAccess(
-                project_id=project_id,
-                user_id=access_data.user_id,
-                permission=access_data.permission,
-                granted_by=granted_by.id
+        with transaction(self.session):
+            if existing_access:
+                existing_access.permission = access_data.permission
+                existing_access.granted_by = granted_by.id
+                self.session.add(existing_access)
+                access = existing_access
+                action = "update_access"
+
+            else:
+                # Create new access
+                access = ProjectAccess(
+                    project_id=project_id,
+                    user_id=access_data.user_id,
+                    permission=access_data.permission,
+                    granted_by=granted_by.id
+                )
+                self.session.add(access)
+                self.session.flush()
+                action = "grant_access"
+
+            log_action(
+                session=self.session,
+                user_id=granted_by.id,
+                action=action,
+                entity_type=EntityType.access,
+                entity_id=access.id,
+                meta={
+                    "project_id": project_id,
+                    "target_user_id": access_data.user_id,
+                    "permission": access_data.permission.value
+                }
             )
-            self.session.add(access)
-            self.session.commit()
-            self.session.refresh(access)
-            action = "grant_access"
-
-        log_action(
-            session=self.session,
-            user_id=granted_by.id,
-            action=action,
-            entity_type=EntityType.access,
-            entity_id=access.id,
-            meta={
-                "project_id": project_id,
-                "target_user_id": access_data.user_id,
-                "permission": access_data.permission.value
-            }
-        )
+
+        self.session.refresh(access)
         
         return ProjectAccessReadWithUser(
             id=access.id,
@@ -113,20 +114,20 @@ class AccessService:
             )
         
         access_id = access.id
-        self.session.delete(access)
-        self.session.commit()
-
-        log_action(
-            session=self.session,
-            user_id=revoked_by.id,
-            action="revoke_access",
-            entity_type=EntityType.access,
-            entity_id=access_id,
-            meta={
-                "project_id": project_id,
-                "target_user_id": user_id
-            }
-        )
+        with transaction(self.session):
+            self.session.delete(access)
+
+            log_action(
+                session=self.session,
+                user_id=revoked_by.id,
+                action="revoke_access",
+                entity_type=EntityType.access,
+                entity_id=access_id,
+                meta={
+                    "project_id": project_id,
+                    "target_user_id": user_id
+                }
+            )
 
     def list_project_access(self, project_id: int, user: User) -> list[ProjectAccessReadWithUser]:
         self._check_project_exists(project_id)
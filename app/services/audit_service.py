@@ -0,0 +1,231 @@
+import csv
+import io
+import json
+from datetime import date, datetime, timezone
+from typing import Iterator, Optional
+from sqlmodel import Session, select, func, or_, and_
+
+from app.core.audit_partitions import partitions_between
+from app.core.config import settings
+from app.core.exports import stream_lines
+from app.models.audit_log import AuditDailyCount, EntityType
+from app.models.user import User
+from app.schemas.audit_log import AuditLogReadWithUser, AuditStatsBucket
+
+STATS_GROUPS = ("day", "user", "action")
+
+EXPORT_CSV = "csv"
+EXPORT_NDJSON = "ndjson"
+EXPORT_COLUMNS = [
+    "id", "created_at", "user_id", "user_email", "action", "entity_type",
+    "entity_id", "project_id", "target_user_id", "meta"
+]
+
+
+def _csv_line(values: list) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+class AuditService:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def list_logs(
+            self,
+            date_from: Optional[date] = None,
+            date_to: Optional[date] = None,
+            user_id: Optional[int] = None,
+            action: Optional[str] = None,
+            entity_type: Optional[EntityType] = None,
+            entity_id: Optional[int] = None,
+            project_id: Optional[int] = None,
+            target_user_id: Optional[int] = None,
+            skip: int = 0,
+            limit: int = 20,
+            after: Optional[tuple[datetime, int]] = None
+    ) -> list[AuditLogReadWithUser]:
+        """Newest-first audit entries with the acting user's email.
+
+        Each filter on its own (and entity_type with entity_id) is an equality
+        prefix of a (..., created_at) index, so each partition is read as an
+        index range in sort order. With several filters SQLite walks one of
+        those indexes and checks the others row by row, still without a sort.
+        `after` is the (created_at, id) of the last row of the previous page.
+        """
+        # months are disjoint and read newest first, so a page usually comes
+        # from the latest partition alone and older ones are never opened
+        newest = date_to
+        if after is not None and (newest is None or after[0].date() < newest):
+            newest = after[0].date()
+        partitions = partitions_between(self.session.connection(), date_from, newest)
+
+        rows = []
+        wanted = skip + limit
+        for table in partitions:
+            statement = self._filter(
+                select(table, User.email).outerjoin(User, User.id == table.c.user_id),
+                table, date_from, date_to, user_id, action, entity_type, entity_id, project_id, target_user_id
+            )
+
+            if after is not None:
+                after_created_at, after_id = after
+                statement = statement.where(or_(
+                    table.c.created_at < after_created_at,
+                    and_(table.c.created_at == after_created_at, table.c.id < after_id)
+                ))
+
+            statement = statement.order_by(table.c.created_at.desc(), table.c.id.desc()).limit(wanted - len(rows))
+            rows.extend(self.session.execute(statement).all())
+            if len(rows) >= wanted:
+                break
+
+        return [
+            AuditLogReadWithUser(
+                id=row.id,
+                user_id=row.user_id,
+                action=row.action,
+                entity_type=row.entity_type,
+                entity_id=row.entity_id,
+                meta=row.meta,
+                project_id=row.project_id,
+                target_user_id=row.target_user_id,
+                created_at=row.created_at,
+                user_email=row.email
+            )
+            for row in rows[skip:]
+        ]
+
+    @staticmethod
+    def _filter(statement, table, date_from, date_to, user_id, action,
+                entity_type, entity_id, project_id, target_user_id):
+        if date_from:
+            dt_from = datetime.combine(date_from, datetime.min.time(), tzinfo=timezone.utc)
+            statement = statement.where(table.c.created_at >= dt_from)
+
+        if date_to:
+            dt_to = datetime.combine(date_to, datetime.max.time(), tzinfo=timezone.utc)
+            statement = statement.where(table.c.created_at <= dt_to)
+
+        if user_id:
+            statement = statement.where(table.c.user_id == user_id)
+
+        if action:
+            statement = statement.where(table.c.action == action)
+
+        if entity_type:
+            statement = statement.where(table.c.entity_type == entity_type)
+
+        if entity_id is not None:
+            statement = statement.where(table.c.entity_id == entity_id)
+
+        if project_id is not None:
+            statement = statement.where(table.c.project_id == project_id)
+
+        if target_user_id is not None:
+            statement = statement.where(table.c.target_user_id == target_user_id)
+
+        return statement
+
+    def export_logs(
+            self,
+            export_format: str,
+            date_from: Optional[date] = None,
+            date_to: Optional[date] = None,
+            user_id: Optional[int] = None,
+            action: Optional[str] = None,
+            entity_type: Optional[EntityType] = None,
+            project_id: Optional[int] = None,
+            target_user_id: Optional[int] = None
+    ) -> Iterator[bytes]:
+        """Matching entries, oldest first, as a lazy CSV or NDJSON byte stream."""
+        filters = (date_from, date_to, user_id, action, entity_type, None, project_id, target_user_id)
+        return stream_lines(
+            self.session.get_bind(),
+            lambda session: self._export_lines(session, export_format, filters)
+        )
+
+    def _export_lines(self, session: Session, export_format: str, filters: tuple) -> Iterator[str]:
+        batch_size = max(settings.TRANSFER_BATCH_SIZE, 1)
+        emails: dict[int, Optional[str]] = {}
+        if export_format == EXPORT_CSV:
+            yield _csv_line(EXPORT_COLUMNS)
+
+        partitions = partitions_between(session.connection(), filters[0], filters[1])
+        for table in reversed(partitions):
+            statement = (
+                self._filter(select(table), table, *filters)
+                .order_by(table.c.created_at, table.c.id)
+                .execution_options(yield_per=batch_size)
+            )
+            for batch in session.execute(statement).partitions():
+                # one lookup per batch instead of a join on every row
+                missing = {row.user_id for row in batch} - emails.keys()
+                if missing:
+                    emails.update({user_id: None for user_id in missing})
+                    emails.update(session.execute(
+                        select(User.id, User.email).where(User.id.in_(missing))
+                    ).tuples().all())
+
+                for row in batch:
+                    log = AuditLogReadWithUser(
+                        id=row.id,
+                        user_id=row.user_id,
+                        action=row.action,
+                        entity_type=row.entity_type,
+                        entity_id=row.entity_id,
+                        meta=row.meta,
+                        project_id=row.project_id,
+                        target_user_id=row.target_user_id,
+                        created_at=row.created_at,
+                        user_email=emails[row.user_id]
+                    )
+                    if export_format == EXPORT_CSV:
+                        values = log.model_dump(mode="json")
+                        values["meta"] = json.dumps(values["meta"]) if values["meta"] is not None else ""
+                        yield _csv_line([values[column] for column in EXPORT_COLUMNS])
+                    else:
+                        yield log.model_dump_json() + "\n"
+
+    def stats(
+            self,
+            group_by: list[str],
+            date_from: Optional[date] = None,
+            date_to: Optional[date] = None,
+            user_id: Optional[int] = None,
+            action: Optional[str] = None
+    ) -> list[AuditStatsBucket]:
+        """Entry counts from the daily rollup; cost grows with buckets, not entries."""
+        columns = {
+            "day": [AuditDailyCount.day],
+            "user": [AuditDailyCount.user_id, User.email],
+            "action": [AuditDailyCount.action]
+        }
+        keys = [column for group in STATS_GROUPS if group in group_by for column in columns[group]]
+        statement = select(*keys, func.sum(AuditDailyCount.entries).label("count"))
+        if "user" in group_by:
+            statement = statement.outerjoin(User, User.id == AuditDailyCount.user_id)
+
+        if date_from:
+            statement = statement.where(AuditDailyCount.day >= date_from)
+        if date_to:
+            statement = statement.where(AuditDailyCount.day <= date_to)
+        if user_id:
+            statement = statement.where(AuditDailyCount.user_id == user_id)
+        if action:
+            statement = statement.where(AuditDailyCount.action == action)
+
+        if keys:
+            statement = statement.group_by(*keys).order_by(*keys)
+
+        return [
+            AuditStatsBucket(
+                day=row._mapping.get("day"),
+                user_id=row._mapping.get("user_id"),
+                user_email=row._mapping.get("email"),
+                action=row._mapping.get("action"),
+                count=row.count or 0
+            )
+            for row in self.session.execute(statement).all()
+        ]
@@ -1,23 +1,60 @@
+import hashlib
 from datetime import datetime, timezone
-from typing import Optional
-from xml.dom.minidom import Document
-from sqlmodel import Session, select, func
+from typing import BinaryIO, Optional
+from sqlalchemy import update
+from sqlalchemy.orm import load_only
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import Session, select
 from fastapi import HTTPException, status
 
 from app.core.audit import log_action
-from app.core.permissions import can_edit_project, can_view_project
+from app.core.blob_store import blob_store
+from app.core.config import settings
+from app.core.diffing import compute_diff, diff_cache
+from app.core.http_cache import if_match_passes, make_etag
+from app.core.permissions import can_edit_project, can_view_project, get_user_project_permissions
+from app.core.version_store import VersionStore
+from app.db.session import engine, transaction
 from app.models.audit_log import EntityType
-from app.models.document import DocumentStatus
+from app.models.document import Document, DocumentStatus
 from app.models.document_version import DocumentVersion
 from app.models.project import Project
+from app.models.project_access import Permission
 from app.models.user import User
-from app.schemas.document import DocumentCreate, DocumentUpdate
-from app.schemas.document_version import DocumentVersionReadWithCreator
+from app.schemas.document import DocumentBulkResult, DocumentBulkUpdateItem, DocumentCreate, DocumentUpdate
+from app.schemas.document_version import DocumentVersionDiff, DocumentVersionRead, DocumentVersionSummary
+
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def document_etag(current_version: int, updated_at: datetime) -> str:
+    # every write moves updated_at, so the value also works as If-Match
+    return make_etag(current_version, updated_at.strftime("%Y%m%d%H%M%S%f"))
+
+
+def version_etag(version: DocumentVersion) -> str:
+    return make_etag(version.version, version.id)
+
+
+def collect_blob_garbage() -> int:
+    """Delete blobs no document or version points at any more: content
+    replaced by a failed upload, or history removed with its project."""
+    with Session(engine) as session:
+        def referenced(digests: list[str]) -> set[str]:
+            used = set(session.exec(select(Document.content_blob).where(Document.content_blob.in_(digests))).all())
+            used.update(session.exec(
+                select(DocumentVersion.content_blob).where(DocumentVersion.content_blob.in_(digests))
+            ).all())
+            return used
+
+        return blob_store.collect_garbage(referenced, settings.BLOB_GC_INTERVAL_SECONDS)
 
 
 class DocumentService:
     def __init__(self, session: Session):
         self.session = session
+        self.versions = VersionStore(session)
 
     def get_by_id(self, doc_id: int) -> Optional[Document]:
         return self.session.get(Document, doc_id)
@@ -41,8 +78,11 @@ class DocumentService:
             )
         return document
     
+    # a granted permission proves the project exists, so the Project row is
+    # only read to tell 404 from 403 once access is denied
     def _check_edit_permission(self, user: User, project_id: int) -> None:
         if not can_edit_project(self.session, user, project_id):
+            self._check_project_exists(project_id)
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Editor access required"
@@ -50,126 +90,353 @@ class DocumentService:
         
     def _check_view_permission(self, user: User, project_id: int) -> None:
         if not can_view_project(self.session, user, project_id):
+            self._check_project_exists(project_id)
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Access denied to this project"
             )
 
-    def create_document(self, project_id: int, doc_data: DocumentCreate,  user: User) -> Document:
-        self._check_project_exists(project_id)
-        self._check_edit_permission(user, project_id)
+    def store_content(self, document: Document, content: str) -> None:
+        """Keep small content inline; move anything above BLOB_THRESHOLD_BYTES to the blob store."""
+        data = content.encode("utf-8")
+        if len(data) > settings.BLOB_THRESHOLD_BYTES:
+            document.content = None
+            document.content_blob = blob_store.put_bytes(data)
+        else:
+            document.content = content
+            document.content_blob = None
+        document.content_size = len(data)
 
-        document = Document(
-            project_id=project_id,
-            title=doc_data.title,
-            content=doc_data.content or "",
-            status=DocumentStatus.draft,
-            created_by=user.id,
-            updated_by=user.id
-        )
-        self.session.add(document)
-        self.session.commit()
-        self.session.refresh(document)
+    def _content_digest(self, document: Document) -> str:
+        if document.content_blob is not None:
+            return document.content_blob
+        return hashlib.sha256((document.content or "").encode("utf-8")).hexdigest()
 
-        version = DocumentVersion(
+    def _inline_content(self, document: Document) -> Optional[str]:
+        # delta base for the next version; None forces a keyframe
+        return None if document.content_blob is not None else (document.content or "")
+
+    def _build_version(self, document: Document, version: int, previous_content: Optional[str], user: User) -> DocumentVersion:
+        return self.versions.build(
             document_id=document.id,
-            version=1,
-            content_snapshot=document.content,
-            created_by=user.id
+            version=version,
+            content=document.content or "",
+            previous_content=previous_content,
+            created_by=user.id,
+            content_blob=document.content_blob
         )
-        self.session.add(version)
-        self.session.commit()
 
-        log_action(
-            session=self.session,
-            user_id=user.id,
-            action="create_document",
-            entity_type=EntityType.document,
-            entity_id=document.id,
-            meta={"title": document.title, "project_id": project_id}
-        )
-        
+    def read_content(self, document: Document) -> str:
+        """Full text of the document, loading it from the blob store if needed."""
+        if document.content_blob is not None:
+            return blob_store.read_text(document.content_blob)
+        return document.content or ""
+
+    def _add_documents(self, project_id: int, items: list[DocumentCreate], user: User) -> list[Document]:
+        """Insert documents with their first version and audit rows; the caller commits."""
+        documents = []
+        for data in items:
+            document = Document(
+                project_id=project_id,
+                title=data.title,
+                status=DocumentStatus.draft,
+                created_by=user.id,
+                updated_by=user.id
+            )
+            self.store_content(document, data.content or "")
+            documents.append(document)
+        self.session.add_all(documents)
+        self.session.flush()
+
+        for document in documents:
+            self.session.add(self._build_version(document, 1, previous_content=None, user=user))
+            log_action(
+                session=self.session,
+                user_id=user.id,
+                action="create_document",
+                entity_type=EntityType.document,
+                entity_id=document.id,
+                meta={"title": document.title, "project_id": project_id}
+            )
+        return documents
+
+    def create_document(self, project_id: int, doc_data: DocumentCreate,  user: User) -> Document:
+        self._check_edit_permission(user, project_id)
+
+        with transaction(self.session):
+            document, = self._add_documents(project_id, [doc_data], user)
+
+        self.session.refresh(document)
         return document
+
+    def bulk_create(self, project_id: int, items: list[DocumentCreate], user: User) -> list[DocumentBulkResult]:
+        self._check_edit_permission(user, project_id)
+
+        with transaction(self.session):
+            documents = self._add_documents(project_id, items, user)
+            results = [
+                DocumentBulkResult(index=index, id=document.id, status_code=status.HTTP_201_CREATED, current_version=1)
+                for index, document in enumerate(documents)
+            ]
+        return results
     
-    def list_documents(self, project_id: int, user: User, skip: int = 0, limit: int = 20) -> list[Document]:
-        self._check_project_exists(project_id)
+    def list_documents(
+            self,
+            project_id: int,
+            user: User,
+            skip: int = 0,
+            limit: int = 20,
+            after_id: Optional[int] = None,
+            fields: Optional[set[str]] = None
+    ) -> list[Document]:
+        """List a project's documents; with `fields`, only those columns (plus id) are selected."""
         self._check_view_permission(user, project_id)
 
         statement = select(Document).where(
             Document.project_id == project_id
-        ).offset(skip).limit(limit)
+        )
+        if fields is not None:
+            columns = {"id"} | fields
+            statement = statement.options(load_only(*(getattr(Document, name) for name in sorted(columns))))
+        if after_id is not None:
+            statement = statement.where(Document.id > after_id)
+
+        statement = statement.order_by(Document.id).offset(skip).limit(limit)
         return list(self.session.exec(statement).all())
     
+    def _visible_project_id(self, doc_id: int, user: User) -> int:
+        """Project of a document the user may view, without loading the document."""
+        project_id = self.session.exec(select(Document.project_id).where(Document.id == doc_id)).first()
+        if project_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Document not found"
+            )
+        self._check_view_permission(user, project_id)
+        return project_id
+
+    def get_document_etag(self, doc_id: int, user: User) -> str:
+        """ETag of the current document state, read from narrow columns only."""
+        row = self.session.exec(
+            select(Document.project_id, Document.current_version, Document.updated_at).where(Document.id == doc_id)
+        ).first()
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Document not found"
+            )
+        project_id, current_version, updated_at = row
+        self._check_view_permission(user, project_id)
+        return document_etag(current_version, updated_at)
+
     def get_document(self, doc_id: int, user: User) -> Document:
         document = self._check_document_exists(doc_id)
         self._check_view_permission(user, document.project_id)
         return document
     
-    def update_document(self, doc_id: int, doc_data: DocumentUpdate, user: User) -> Document:
+    def update_document(
+            self,
+            doc_id: int,
+            doc_data: DocumentUpdate,
+            user: User,
+            expected_version: Optional[int] = None,
+            if_match: Optional[str] = None
+    ) -> Document:
         document = self._check_document_exists(doc_id)
         self._check_edit_permission(user, document.project_id)
+        self._check_expected_version(document, expected_version, if_match)
         
         update_data = doc_data.model_dump(exclude_unset=True)
+        with transaction(self.session):
+            guarded = expected_version is not None or if_match is not None
+            self._apply_update(document, update_data, user, guarded=guarded)
+        
+        self.session.refresh(document)
+        return document
+
+    def _apply_update(
+            self,
+            document: Document,
+            update_data: dict,
+            user: User,
+            guarded: bool = False
+    ) -> int:
+        """Write a PATCH inside the caller's transaction; returns the resulting version.
+
+        `guarded` writes go through the compare-and-set even when only
+        metadata changes, so a precondition checked earlier still holds.
+        """
         content_changed = False
+        new_content = None
+        if "content" in update_data:
+            new_content = update_data["content"] or ""
+            content_changed = (
+                hashlib.sha256(new_content.encode("utf-8")).hexdigest() != self._content_digest(document)
+            )
 
-        if "content" in update_data and update_data["content"] != document.content:
-            content_changed = True
+        previous_content = self._inline_content(document)
+        new_version = document.current_version
+        if content_changed or guarded:
+            new_version = self._claim_version(document, bump=content_changed)
 
         for key, value in update_data.items():
-            setattr(document, key, value)
-        
+            if key != "content":
+                setattr(document, key, value)
+        if content_changed:
+            self.store_content(document, new_content)
+
         document.updated_by = user.id
         document.updated_at = datetime.now(timezone.utc)
-        
         self.session.add(document)
-        self.session.commit()
 
         if content_changed:
-            max_version = self._get_max_version(doc_id)
-            version = DocumentVersion(
-                document_id=doc_id,
-                version=max_version + 1,
-                content_snapshot=document.content,
-                created_by=user.id
-            )
+            version = self._build_version(document, new_version, previous_content, user)
             self.session.add(version)
-            self.session.commit()
-        
-        self.session.refresh(document)
 
         log_action(
             session=self.session,
             user_id=user.id,
             action="update_document",
             entity_type=EntityType.document,
-            entity_id=doc_id,
+            entity_id=document.id,
             meta={
+                "project_id": document.project_id,
                 "updated_fields": list(update_data.keys()),
                 "content_changed": content_changed
             }
         )
-        
-        return document
+        return new_version
     
-    def _get_max_version(self, doc_id: int) -> int:
-        statement = select(func.max(DocumentVersion.version)).where(
-            DocumentVersion.document_id == doc_id
+    def upload_content(
+            self,
+            doc_id: int,
+            upload: BinaryIO,
+            user: User,
+            expected_version: Optional[int] = None,
+            if_match: Optional[str] = None
+    ) -> Document:
+        """Replace the content from a spooled upload without reading it all into memory.
+
+        Uploads above BLOB_THRESHOLD_BYTES are copied chunk by chunk into the
+        blob store; smaller ones are stored inline as usual.
+        """
+        document = self._check_document_exists(doc_id)
+        self._check_edit_permission(user, document.project_id)
+        self._check_expected_version(document, expected_version, if_match)
+
+        size = upload.seek(0, 2)
+        upload.seek(0)
+        try:
+            if size > settings.BLOB_THRESHOLD_BYTES:
+                digest, size = blob_store.put_stream(iter(lambda: upload.read(UPLOAD_CHUNK_SIZE), b""))
+                new_content = None
+            else:
+                new_content = upload.read().decode("utf-8")
+                digest = hashlib.sha256(new_content.encode("utf-8")).hexdigest()
+        except (ValueError, UnicodeDecodeError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Content must be UTF-8 text"
+            )
+
+        content_changed = digest != self._content_digest(document)
+        previous_content = self._inline_content(document)
+        with transaction(self.session):
+            if content_changed or expected_version is not None or if_match is not None:
+                new_version = self._claim_version(document, bump=content_changed)
+
+            if content_changed:
+                if new_content is None:
+                    document.content = None
+                    document.content_blob = digest
+                    document.content_size = size
+                else:
+                    self.store_content(document, new_content)
+                document.updated_by = user.id
+                document.updated_at = datetime.now(timezone.utc)
+                self.session.add(document)
+
+                version = self._build_version(document, new_version, previous_content, user)
+                self.session.add(version)
+
+            log_action(
+                session=self.session,
+                user_id=user.id,
+                action="update_document",
+                entity_type=EntityType.document,
+                entity_id=doc_id,
+                meta={
+                    "project_id": document.project_id,
+                    "updated_fields": ["content"],
+                    "content_changed": content_changed,
+                    "content_size": size
+                }
+            )
+
+        self.session.refresh(document)
+        return document
+
+    def _version_conflict(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Document was modified by someone else; reload and retry"
+        )
+
+    def _check_expected_version(
+            self,
+            document: Document,
+            expected_version: Optional[int],
+            if_match: Optional[str] = None
+    ) -> None:
+        if expected_version is not None and expected_version != document.current_version:
+            raise self._version_conflict()
+        if not if_match_passes(if_match, document_etag(document.current_version, document.updated_at)):
+            raise self._version_conflict()
+
+    def _claim_version(self, document: Document, bump: bool) -> int:
+        """Compare-and-set the state this request loaded.
+
+        The UPDATE only matches if nobody committed a change in between, so
+        concurrent editors cannot both get the same version number and a
+        precondition checked on load cannot be overtaken by a metadata edit.
+        It moves updated_at, and with it the document ETag.
+        """
+        expected = document.current_version
+        new_version = expected + 1 if bump else expected
+        now = datetime.now(timezone.utc)
+        statement = (
+            update(Document)
+            .where(
+                Document.id == document.id,
+                Document.current_version == expected,
+                Document.updated_at == document.updated_at
+            )
+            .values(current_version=new_version, updated_at=now)
+            .execution_options(synchronize_session=False)
         )
-        return self.session.exec(statement).first() or 0
+        if self.session.execute(statement).rowcount == 0:
+            raise self._version_conflict()
+
+        set_committed_value(document, "current_version", new_version)
+        set_committed_value(document, "updated_at", now)
+        return new_version
     
     def change_status(self, doc_id: int, new_status: DocumentStatus, user: User) -> Document:
         document = self._check_document_exists(doc_id)
         self._check_edit_permission(user, document.project_id)
 
+        with transaction(self.session):
+            self._apply_status(document, new_status, user)
+        
+        self.session.refresh(document)
+        return document
+
+    def _apply_status(self, document: Document, new_status: DocumentStatus, user: User) -> None:
         old_status = document.status
         document.status = new_status
         document.updated_by = user.id
         document.updated_at = datetime.now(timezone.utc)
-        
         self.session.add(document)
-        self.session.commit()
-        self.session.refresh(document)
-
 
         action_name = f"{new_status.value}_document"
         log_action(
@@ -177,45 +444,142 @@ class DocumentService:
             user_id=user.id,
             action=action_name,
             entity_type=EntityType.document,
-            entity_id=doc_id,
-            meta={"old_status": old_status.value, "new_status": new_status.value}
+            entity_id=document.id,
+            meta={
+                "project_id": document.project_id,
+                "old_status": old_status.value,
+                "new_status": new_status.value
+            }
         )
-        
-        return document
+
+    def _load_editable(self, doc_ids: list[int], user: User) -> tuple[dict[int, Document], dict[int, DocumentBulkResult]]:
+        """Load a batch of documents in one query and resolve edit rights once per project.
+
+        Returns the editable documents and the error results for the rest.
+        """
+        documents = {
+            document.id: document
+            for document in self.session.exec(select(Document).where(Document.id.in_(set(doc_ids)))).all()
+        }
+        permissions = get_user_project_permissions(
+            self.session, user, {document.project_id for document in documents.values()}
+        )
+
+        errors: dict[int, DocumentBulkResult] = {}
+        for doc_id in set(doc_ids):
+            document = documents.get(doc_id)
+            if document is None:
+                errors[doc_id] = DocumentBulkResult(
+                    index=0, id=doc_id, status_code=status.HTTP_404_NOT_FOUND, detail="Document not found"
+                )
+            elif permissions.get(document.project_id) != Permission.editor:
+                errors[doc_id] = DocumentBulkResult(
+                    index=0, id=doc_id, status_code=status.HTTP_403_FORBIDDEN, detail="Editor access required"
+                )
+                del documents[doc_id]
+        return documents, errors
+
+    def bulk_update(self, items: list[DocumentBulkUpdateItem], user: User) -> list[DocumentBulkResult]:
+        """Apply many PATCHes in one transaction; failed items are reported, not raised."""
+        documents, errors = self._load_editable([item.id for item in items], user)
+
+        results = []
+        with transaction(self.session):
+            for index, item in enumerate(items):
+                if item.id in errors:
+                    results.append(errors[item.id].model_copy(update={"index": index}))
+                    continue
+
+                document = documents[item.id]
+                update_data = item.model_dump(exclude_unset=True, exclude={"id", "expected_version"})
+                try:
+                    self._check_expected_version(document, item.expected_version)
+                    new_version = self._apply_update(
+                        document, update_data, user, guarded=item.expected_version is not None
+                    )
+                except HTTPException as exc:
+                    # raised before anything was written for this item
+                    results.append(DocumentBulkResult(
+                        index=index, id=item.id, status_code=exc.status_code, detail=exc.detail
+                    ))
+                    continue
+                results.append(DocumentBulkResult(
+                    index=index, id=item.id, status_code=status.HTTP_200_OK, current_version=new_version
+                ))
+        return results
+
+    def bulk_change_status(self, doc_ids: list[int], new_status: DocumentStatus, user: User) -> list[DocumentBulkResult]:
+        documents, errors = self._load_editable(doc_ids, user)
+
+        results = []
+        with transaction(self.session):
+            for index, doc_id in enumerate(doc_ids):
+                if doc_id in errors:
+                    results.append(errors[doc_id].model_copy(update={"index": index}))
+                    continue
+
+                document = documents[doc_id]
+                self._apply_status(document, new_status, user)
+                results.append(DocumentBulkResult(
+                    index=index, id=doc_id, status_code=status.HTTP_200_OK, current_version=document.current_version
+                ))
+        return results
     
-    def list_versions(self, doc_id: int, user: User) -> list[DocumentVersionReadWithCreator]:
+    def list_versions(
+            self,
+            doc_id: int,
+            user: User,
+            skip: int = 0,
+            limit: int = 20,
+            before_version: Optional[int] = None
+    ) -> list[DocumentVersionSummary]:
         document = self._check_document_exists(doc_id)
         self._check_view_permission(user, document.project_id)
         
-        statement = select(DocumentVersion).where(
+        statement = select(
+            DocumentVersion.id,
+            DocumentVersion.document_id,
+            DocumentVersion.version,
+            DocumentVersion.created_by,
+            DocumentVersion.created_at,
+            User.email
+        ).outerjoin(
+            User, User.id == DocumentVersion.created_by
+        ).where(
             DocumentVersion.document_id == doc_id
-        ).order_by(DocumentVersion.version.desc())
-        versions = self.session.exec(statement).all()
-
-
-        result = []
-        for ver in versions:
-            creator = self.session.get(User, ver.created_by)
-            result.append(DocumentVersionReadWithCreator(
-                id=ver.id,
-                document_id=ver.document_id,
-                version=ver.version,
-                content_snapshot=ver.content_snapshot,
-                created_by=ver.created_by,
-                created_at=ver.created_at,
-                creator_email=creator.email if creator else None
-            ))
-        
-        return result
+        )
+        if before_version is not None:
+            statement = statement.where(DocumentVersion.version < before_version)
+
+        statement = statement.order_by(DocumentVersion.version.desc()).offset(skip).limit(limit)
+
+        return [
+            DocumentVersionSummary(
+                id=ver_id,
+                document_id=document_id,
+                version=version,
+                created_by=created_by,
+                created_at=created_at,
+                creator_email=creator_email
+            )
+            for ver_id, document_id, version, created_by, created_at, creator_email
+            in self.session.exec(statement).all()
+        ]
     
     def get_version(self, doc_id: int, version: int, user: User) -> DocumentVersion:
-        document = self._check_document_exists(doc_id)
-        self._check_view_permission(user, document.project_id)
+        """Version row without its payload; enough for the ETag, decoded by `read_version`."""
+        self._visible_project_id(doc_id, user)
         
         statement = select(DocumentVersion).where(
             DocumentVersion.document_id == doc_id,
             DocumentVersion.version == version
-        )
+        ).options(load_only(
+            DocumentVersion.id,
+            DocumentVersion.document_id,
+            DocumentVersion.version,
+            DocumentVersion.created_by,
+            DocumentVersion.created_at
+        ))
         ver = self.session.exec(statement).first()
         
         if not ver:
@@ -223,50 +587,122 @@ class DocumentService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Version not found"
             )
-        
-        return ver  
+        return ver
+
+    def read_version(self, ver: DocumentVersion) -> DocumentVersionRead:
+        return DocumentVersionRead(
+            id=ver.id,
+            document_id=ver.document_id,
+            version=ver.version,
+            content_snapshot=self.versions.load_content(ver.document_id, ver.version) or "",
+            created_by=ver.created_by,
+            created_at=ver.created_at
+        )
     
-    def restore_version(self, doc_id: int, version: int, user: User) -> Document:
+    def diff_versions(
+            self,
+            doc_id: int,
+            from_version: int,
+            to_version: int,
+            user: User,
+            context: int = 3
+    ) -> DocumentVersionDiff:
+        document = self._check_document_exists(doc_id)
+        self._check_view_permission(user, document.project_id)
+
+        key = (doc_id, from_version, to_version, context)
+        cached = diff_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # each side replays at most one keyframe interval, however far apart
+        old = self.versions.load_content(doc_id, from_version)
+        new = old if to_version == from_version else self.versions.load_content(doc_id, to_version)
+        if old is None or new is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Version not found"
+            )
+        if max(old.count("\n"), new.count("\n")) >= settings.DIFF_MAX_LINES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Versions over {settings.DIFF_MAX_LINES} lines cannot be diffed"
+            )
+
+        changes, unified = compute_diff(
+            old,
+            new,
+            f"v{from_version}",
+            f"v{to_version}",
+            context
+        )
+        diff = DocumentVersionDiff(
+            document_id=doc_id,
+            from_version=from_version,
+            to_version=to_version,
+            added=sum(len(change.new_lines) for change in changes),
+            removed=sum(len(change.old_lines) for change in changes),
+            unified=unified,
+            changes=changes
+        )
+        diff_cache.set(key, diff)
+        return diff
+
+    def restore_version(
+            self,
+            doc_id: int,
+            version: int,
+            user: User,
+            expected_version: Optional[int] = None,
+            if_match: Optional[str] = None
+    ) -> Document:
         document = self._check_document_exists(doc_id)
         self._check_edit_permission(user, document.project_id)
+        self._check_expected_version(document, expected_version, if_match)
 
-        statement = select(DocumentVersion).where(
+        statement = select(DocumentVersion.content_blob).where(
             DocumentVersion.document_id == doc_id,
             DocumentVersion.version == version
         )
-        ver = self.session.exec(statement).first()
+        restored_blob = self.session.exec(statement).first()
+        restored_content = None if restored_blob else self.versions.load_content(doc_id, version)
         
-        if not ver:
+        if restored_blob is None and restored_content is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Version not found"
             )
         
-        document.content = ver.content_snapshot
-        document.updated_by = user.id
-        document.updated_at = datetime.now(timezone.utc)
-        
-        self.session.add(document)
-        self.session.commit()
+        previous_content = self._inline_content(document)
+        with transaction(self.session):
+            new_version_number = self._claim_version(document, bump=True)
 
-        max_version = self._get_max_version(doc_id)
-        new_version = DocumentVersion(
-            document_id=doc_id,
-            version=max_version + 1,
-            content_snapshot=document.content,
-            created_by=user.id
-        )
-        self.session.add(new_version)
-        self.session.commit()
-        self.session.refresh(document)
+            if restored_blob:
+                # content-addressed: point at the same blob instead of copying it
+                document.content = None
+                document.content_blob = restored_blob
+                document.content_size = blob_store.size(restored_blob)
+            else:
+                self.store_content(document, restored_content)
+            document.updated_by = user.id
+            document.updated_at = datetime.now(timezone.utc)
+            self.session.add(document)
 
-        log_action(
-            session=self.session,
-            user_id=user.id,
-            action="restore_version",
-            entity_type=EntityType.document,
-            entity_id=doc_id,
-            meta={"restored_version": version, "new_version": max_version + 1}
-        )
+            new_version = self._build_version(document, new_version_number, previous_content, user)
+            self.session.add(new_version)
+
+            log_action(
+                session=self.session,
+                user_id=user.id,
+                action="restore_version",
+                entity_type=EntityType.document,
+                entity_id=doc_id,
+                meta={
+                    "project_id": document.project_id,
+                    "restored_version": version,
+                    "new_version": new_version_number
+                }
+            )
         
+        self.session.refresh(document)
         return document
\ No newline at end of file
@@ -1,9 +1,13 @@
+import hashlib
 from typing import Optional
+from sqlalchemy import union
 from sqlmodel import Session, select
 from fastapi import HTTPException, status
 
 from app.core.audit import log_action
+from app.core.http_cache import make_etag
 from app.core.permissions import can_manage_project, can_view_project
+from app.db.session import transaction
 from app.models.audit_log import EntityType
 from app.models.project import Project
 from app.models.project_access import ProjectAccess
@@ -11,6 +15,12 @@ from app.models.user import User, UserRole
 from app.schemas.project import ProjectCreate, ProjectUpdate
 
 
+def project_etag(project: Project) -> str:
+    # projects carry no version column; the row is small enough to hash
+    state = f"{project.id}\0{project.title}\0{project.description or ''}\0{project.owner_id}"
+    return make_etag(hashlib.sha256(state.encode("utf-8")).hexdigest()[:32])
+
+
 class ProjectService:
     def __init__(self, session: Session):
         self.session = session
@@ -20,49 +30,51 @@ class ProjectService:
     
     def create_project(self,  project_data: ProjectCreate, owner: User) -> Project:
         
-        project = Project(
-            title=project_data.title,
-            description=project_data.description,
-            owner_id=owner.id
-        )
-        self.session.add(project)
-        self.session.commit()
-        self.session.refresh(project)
-
-        log_action(
-            session=self.session,
-            user_id=owner.id,
-            action="create_project",
-            entity_type=EntityType.project,
-            entity_id=project.id,
-            meta={"title": project.title}
-        )
+        with transaction(self.session):
+            project = Project(
+                title=project_data.title,
+                description=project_data.description,
+                owner_id=owner.id
+            )
+            self.session.add(project)
+            self.session.flush()
+
+            log_action(
+                session=self.session,
+                user_id=owner.id,
+                action="create_project",
+                entity_type=EntityType.project,
+                entity_id=project.id,
+                meta={"title": project.title}
+            )
         
+        self.session.refresh(project)
         return project
     
-    def list_projects(self, user: User, skip: int = 0, limit: int = 20) -> list[Project]:
-        if user.role == UserRole.admin:
-            statement = select(Project).offset(skip).limit(limit)
-            return list(self.session.exec(statement).all())
-        
-        owned_statement = select(Project).where(Project.owner_id == user.id)
-        owned_projects = self.session.exec(owned_statement).all()
-        owned_ids = {p.id for p in owned_projects}
-
-
-        access_statement = select(ProjectAccess).where(ProjectAccess.user_id == user.id)
-        accesses = self.session.exec(access_statement).all()
-        access_project_ids = {a.project_id for a in accesses}
-
-
-        all_project_ids = owned_ids | access_project_ids
-        
-        if not all_project_ids:
-            return []
-        
-        statement = select(Project).where(
-            Project.id.in_(all_project_ids)
-        ).offset(skip).limit(limit)
+    def list_projects(self, user: User, skip: int = 0, limit: int = 20, after_id: Optional[int] = None) -> list[Project]:
+        statement = select(Project)
+
+        # access is filtered in SQL, not via get_user_project_permissions,
+        # so that LIMIT/OFFSET and the keyset cursor count visible rows only
+        if user.role != UserRole.admin:
+            # owned and granted ids are each read in id order from their
+            # (owner_id, id) and (user_id, project_id) indexes, starting after
+            # the cursor and stopping at the page end, so a page costs the
+            # same however many projects the user can see
+            page_end = skip + limit
+            owned = select(Project.id.label("id")).where(Project.owner_id == user.id)
+            granted = select(ProjectAccess.project_id.label("id")).where(ProjectAccess.user_id == user.id)
+            if after_id is not None:
+                owned = owned.where(Project.id > after_id)
+                granted = granted.where(ProjectAccess.project_id > after_id)
+            owned = owned.order_by(Project.id).limit(page_end).subquery()
+            granted = granted.order_by(ProjectAccess.project_id).limit(page_end).subquery()
+            visible = union(select(owned.c.id), select(granted.c.id)).subquery()
+            statement = statement.join(visible, Project.id == visible.c.id)
+        elif after_id is not None:
+            statement = statement.where(Project.id > after_id)
+
+        statement = statement.order_by(Project.id).offset(skip).limit(limit)
         return list(self.session.exec(statement).all())
     
     def get_project(self, project_id: int, user: User) -> Project:
@@ -96,22 +108,21 @@ class ProjectService:
             )
         
         update_data = project_data.model_dump(exclude_unset=True)
-        for key, value in update_data.items():
-            setattr(project, key, value)
+        with transaction(self.session):
+            for key, value in update_data.items():
+                setattr(project, key, value)
+            self.session.add(project)
+
+            log_action(
+                session=self.session,
+                user_id=user.id,
+                action="update_project",
+                entity_type=EntityType.project,
+                entity_id=project.id,
+                meta={"updated_fields": list(update_data.keys())}
+            )
         
-        self.session.add(project)
-        self.session.commit()
         self.session.refresh(project)
-
-        log_action(
-            session=self.session,
-            user_id=user.id,
-            action="update_project",
-            entity_type=EntityType.project,
-            entity_id=project.id,
-            meta={"updated_fields": list(update_data.keys())}
-        )
-        
         return project
     
     def delete_project(self, project_id: int, user: User) -> None:
@@ -129,17 +140,17 @@ class ProjectService:
             )
         
         project_title = project.title
-        self.session.delete(project)
-        self.session.commit()
-
-        log_action(
-            session=self.session,
-            user_id=user.id,
-            action="delete_project",
-            entity_type=EntityType.project,
-            entity_id=project_id,
-            meta={"title": project_title}
-        )
+        with transaction(self.session):
+            self.session.delete(project)
+
+            log_action(
+                session=self.session,
+                user_id=user.id,
+                action="delete_project",
+                entity_type=EntityType.project,
+                entity_id=project_id,
+                meta={"title": project_title}
+            )
 
         
 
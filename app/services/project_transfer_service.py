@@ -0,0 +1,294 @@
+from datetime import datetime, timezone
+from typing import BinaryIO, Iterator, Optional
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select
+from fastapi import HTTPException, status
+
+from app.core.audit import log_action
+from app.core.blob_store import blob_store
+from app.core.config import settings
+from app.core.exports import ndjson_lines, stream_lines
+from app.core.permissions import can_manage_project
+from app.core.version_store import VersionStore, decode_payload
+from app.db.session import transaction
+from app.models.audit_log import EntityType
+from app.models.document import Document
+from app.models.document_version import DocumentVersion
+from app.models.project import Project
+from app.models.project_access import ProjectAccess
+from app.models.user import User
+from app.schemas.project_transfer import (
+    EXPORT_FORMAT_VERSION,
+    AccessExportRecord,
+    DocumentExportRecord,
+    ExportRecord,
+    ProjectExportRecord,
+    ProjectImportResult,
+    VersionExportRecord
+)
+from app.services.document_service import DocumentService
+
+
+class _PendingDocument:
+    """Document being imported: its versions are encoded as they arrive and
+    inserted once the document row (and so its id) exists."""
+
+    def __init__(self, record: DocumentExportRecord):
+        self.record = record
+        self.versions: list[DocumentVersion] = []
+        self.content: Optional[str] = None
+        self.last_version = 0
+
+
+class ProjectTransferService:
+    def __init__(self, session: Session):
+        self.session = session
+        self.documents = DocumentService(session)
+        self.version_store = VersionStore(session)
+        self.batch_size = max(settings.TRANSFER_BATCH_SIZE, 1)
+        self._user_ids: dict[str, Optional[int]] = {}
+
+    def export_project(self, project_id: int, user: User) -> Iterator[bytes]:
+        """Check access now and return the NDJSON body as a lazy byte stream."""
+        if self.session.get(Project, project_id) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
+        if not can_manage_project(self.session, user, project_id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only admin or project owner can export"
+            )
+        return stream_lines(
+            self.session.get_bind(),
+            lambda session: ndjson_lines(self._export_records(session, project_id))
+        )
+
+    def _export_records(self, session: Session, project_id: int) -> Iterator[BaseModel]:
+        owner = aliased(User)
+        title, description, owner_email = session.exec(
+            select(Project.title, Project.description, owner.email)
+            .outerjoin(owner, owner.id == Project.owner_id)
+            .where(Project.id == project_id)
+        ).one()
+        yield ProjectExportRecord(title=title, description=description, owner=owner_email)
+
+        grantee, granter = aliased(User), aliased(User)
+        accesses = session.exec(
+            select(ProjectAccess.permission, grantee.email, granter.email)
+            .join(grantee, grantee.id == ProjectAccess.user_id)
+            .outerjoin(granter, granter.id == ProjectAccess.granted_by)
+            .where(ProjectAccess.project_id == project_id)
+            .order_by(ProjectAccess.id)
+        )
+        for permission, user_email, granter_email in accesses:
+            yield AccessExportRecord(user=user_email, permission=permission, granted_by=granter_email)
+
+        creator, updater, version_creator = aliased(User), aliased(User), aliased(User)
+        statement = (
+            select(
+                Document.id, Document.title, Document.status, Document.created_at, Document.updated_at,
+                creator.email, updater.email,
+                DocumentVersion.version, DocumentVersion.is_keyframe, DocumentVersion.payload,
+                DocumentVersion.content_snapshot, DocumentVersion.content_blob,
+                DocumentVersion.created_at, version_creator.email
+            )
+            .outerjoin(DocumentVersion, DocumentVersion.document_id == Document.id)
+            .outerjoin(creator, creator.id == Document.created_by)
+            .outerjoin(updater, updater.id == Document.updated_by)
+            .outerjoin(version_creator, version_creator.id == DocumentVersion.created_by)
+            .where(Document.project_id == project_id)
+            .order_by(Document.id, DocumentVersion.version, DocumentVersion.id)
+            .execution_options(yield_per=self.batch_size)
+        )
+
+        # one pass over all versions of the project; only the text of the
+        # previous version is kept to resolve deltas
+        current_id = None
+        content = None
+        for row in session.execute(statement):
+            (doc_id, doc_title, doc_status, created_at, updated_at, created_by, updated_by,
+             version, is_keyframe, payload, snapshot, blob, version_created_at, version_created_by) = row
+            if doc_id != current_id:
+                current_id, content = doc_id, None
+                yield DocumentExportRecord(
+                    ref=doc_id,
+                    title=doc_title,
+                    status=doc_status,
+                    created_by=created_by,
+                    updated_by=updated_by,
+                    created_at=created_at,
+                    updated_at=updated_at
+                )
+            if version is None:
+                continue
+            content = decode_payload(payload, is_keyframe, content, snapshot, blob)
+            yield VersionExportRecord(
+                document=doc_id,
+                version=version,
+                content=content,
+                created_by=version_created_by,
+                created_at=version_created_at
+            )
+
+    def _user_id(self, email: Optional[str]) -> Optional[int]:
+        if email is None:
+            return None
+        if email not in self._user_ids:
+            self._user_ids[email] = self.session.exec(select(User.id).where(User.email == email)).first()
+        return self._user_ids[email]
+
+    def _parse(self, upload: BinaryIO) -> Iterator[BaseModel]:
+        for line_number, line in enumerate(upload, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield ExportRecord.validate_json(line)
+            except ValidationError as exc:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Line {line_number}: {exc.errors(include_url=False)[0]['msg']}"
+                )
+
+    def import_project(self, upload: BinaryIO, user: User, title: Optional[str] = None) -> ProjectImportResult:
+        """Create a new project owned by `user` from an export stream.
+
+        Everything is written in one transaction, so a bad line leaves
+        nothing behind; version rows are inserted TRANSFER_BATCH_SIZE at a time.
+        """
+        upload.seek(0)
+        records = self._parse(upload)
+        header = next(records, None)
+        if not isinstance(header, ProjectExportRecord) or header.format != EXPORT_FORMAT_VERSION:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Expected a project line with format {EXPORT_FORMAT_VERSION} first"
+            )
+
+        result = ProjectImportResult(project_id=0, documents=0, versions=0, accesses=0)
+        with transaction(self.session):
+            project = Project(title=title or header.title, description=header.description, owner_id=user.id)
+            self.session.add(project)
+            self.session.flush()
+            result.project_id = project.id
+
+            pending: Optional[_PendingDocument] = None
+            version_rows: list[dict] = []
+            # one grant per user, as (project_id, user_id) is unique; a repeated line updates it
+            accesses: dict[int, ProjectAccess] = {}
+            for record in records:
+                if isinstance(record, AccessExportRecord):
+                    user_id = self._user_id(record.user)
+                    if user_id is None:
+                        if record.user not in result.skipped_users:
+                            result.skipped_users.append(record.user)
+                    elif user_id in accesses:
+                        accesses[user_id].permission = record.permission
+                    elif user_id != user.id:
+                        accesses[user_id] = ProjectAccess(
+                            project_id=project.id,
+                            user_id=user_id,
+                            permission=record.permission,
+                            granted_by=user.id
+                        )
+                        self.session.add(accesses[user_id])
+                        result.accesses += 1
+
+                elif isinstance(record, DocumentExportRecord):
+                    if pending is not None:
+                        version_rows.extend(self._insert_document(project.id, pending, user))
+                        result.documents += 1
+                    pending = _PendingDocument(record)
+
+                elif isinstance(record, VersionExportRecord):
+                    if pending is None or record.document != pending.record.ref or record.version <= pending.last_version:
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Version {record.version} of document {record.document} is out of order"
+                        )
+                    self._add_version(pending, record, user)
+                    result.versions += 1
+
+                else:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Only one project line is allowed"
+                    )
+
+                if len(version_rows) >= self.batch_size:
+                    self.session.execute(insert(DocumentVersion), version_rows)
+                    version_rows = []
+
+            if pending is not None:
+                version_rows.extend(self._insert_document(project.id, pending, user))
+                result.documents += 1
+            if version_rows:
+                self.session.execute(insert(DocumentVersion), version_rows)
+
+            log_action(
+                session=self.session,
+                user_id=user.id,
+                action="import_project",
+                entity_type=EntityType.project,
+                entity_id=project.id,
+                meta=result.model_dump(exclude={"project_id"})
+            )
+
+        return result
+
+    def _add_version(self, pending: _PendingDocument, record: VersionExportRecord, user: User) -> None:
+        data = record.content.encode("utf-8")
+        content_blob = blob_store.put_bytes(data) if len(data) > settings.BLOB_THRESHOLD_BYTES else None
+        previous = None if pending.versions and pending.versions[-1].content_blob else pending.content
+
+        version = self.version_store.build(
+            document_id=0,
+            version=record.version,
+            content=record.content,
+            previous_content=previous,
+            created_by=self._user_id(record.created_by) or user.id,
+            content_blob=content_blob
+        )
+        version.created_at = record.created_at
+        pending.versions.append(version)
+        pending.content = record.content
+        pending.last_version = record.version
+
+    def _insert_document(self, project_id: int, pending: _PendingDocument, user: User) -> list[dict]:
+        """Insert the document row; returns its version rows for the next batch insert."""
+        record = pending.record
+        document = Document(
+            project_id=project_id,
+            title=record.title,
+            status=record.status,
+            current_version=pending.last_version or 1,
+            created_by=self._user_id(record.created_by) or user.id,
+            updated_by=self._user_id(record.updated_by) or user.id,
+            created_at=record.created_at,
+            updated_at=record.updated_at
+        )
+        self.documents.store_content(document, pending.content or "")
+        self.session.add(document)
+        self.session.flush()
+        self.session.expunge(document)
+
+        if not pending.versions:
+            # keep the invariant that every document has a first version
+            pending.versions.append(self.version_store.build(
+                document_id=0,
+                version=1,
+                content=pending.content or "",
+                previous_content=None,
+                created_by=document.created_by
+            ))
+            pending.versions[0].created_at = datetime.now(timezone.utc)
+
+        rows = []
+        for version in pending.versions:
+            row = version.model_dump(exclude={"id"})
+            row["document_id"] = document.id
+            rows.append(row)
+        return rows
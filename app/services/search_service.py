@@ -0,0 +1,84 @@
+import html
+from typing import Optional
+from sqlalchemy import text
+from sqlmodel import Session
+from fastapi import HTTPException, status
+
+from app.core.search_index import SEARCH_TABLE
+from app.models.user import User, UserRole
+from app.schemas.document import DocumentSearchResult
+
+
+SNIPPET_TOKENS = 16
+# private-use characters mark hits inside the raw snippet; the text is
+# HTML-escaped first and only then are they turned into <mark> tags
+_HIT_OPEN = "\ue000"
+_HIT_CLOSE = "\ue001"
+
+# the table name is a constant; everything else is a bound parameter and
+# unused filters are switched off by passing NULL
+_SEARCH_STATEMENT = text(
+    f"SELECT d.id, d.project_id, d.title, d.status, d.current_version, d.updated_at, "
+    f"snippet({SEARCH_TABLE}, 1, :hit_open, :hit_close, '…', :snippet_tokens) AS snippet, "
+    f"bm25({SEARCH_TABLE}, 10.0, 1.0) AS score "
+    f"FROM {SEARCH_TABLE} JOIN documents d ON d.id = {SEARCH_TABLE}.rowid "
+    f"WHERE {SEARCH_TABLE} MATCH :match "
+    "AND (:project_id IS NULL OR d.project_id = :project_id) "
+    "AND (:user_id IS NULL OR d.project_id IN ("
+    "SELECT id FROM projects WHERE owner_id = :user_id "
+    "UNION SELECT project_id FROM project_accesses WHERE user_id = :user_id)) "
+    "ORDER BY score, d.id LIMIT :limit OFFSET :skip"
+)
+
+
+def build_match_query(query: str) -> str:
+    """Turn user input into an FTS5 query: every term must match, `term*` is a prefix search."""
+    terms = []
+    for term in query.split():
+        prefix = term.endswith("*")
+        term = term.rstrip("*").replace('"', '""')
+        if term:
+            terms.append(f'"{term}"*' if prefix else f'"{term}"')
+    return " ".join(terms)
+
+
+def highlight_snippet(snippet: str) -> str:
+    return html.escape(snippet).replace(_HIT_OPEN, "<mark>").replace(_HIT_CLOSE, "</mark>")
+
+
+class SearchService:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def search_documents(
+            self,
+            query: str,
+            user: User,
+            project_id: Optional[int] = None,
+            skip: int = 0,
+            limit: int = 20
+    ) -> list[DocumentSearchResult]:
+        match = build_match_query(query)
+        if not match:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Search query is empty"
+            )
+
+        # permissions are part of the statement, so rows the user cannot
+        # see are never read or ranked into the page
+        params = {
+            "match": match,
+            "hit_open": _HIT_OPEN,
+            "hit_close": _HIT_CLOSE,
+            "snippet_tokens": SNIPPET_TOKENS,
+            "project_id": project_id,
+            "user_id": None if user.role == UserRole.admin else user.id,
+            "limit": limit,
+            "skip": skip
+        }
+        rows = self.session.execute(_SEARCH_STATEMENT, params).mappings().all()
+        return [
+            DocumentSearchResult(**{**row, "snippet": highlight_snippet(row["snippet"])})
+            for row in rows
+        ]
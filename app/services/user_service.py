@@ -2,14 +2,16 @@ from datetime import timedelta
 from typing import Optional
 from sqlmodel import Session, select
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from app.schemas.token import Token
 
-from app.core.security import create_access_token, get_password_hash, verify_password
+from app.core.security import create_access_token, get_password_hash, password_pool, verify_password
 from app.models.audit_log import EntityType
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, UserLogin
 from app.core.audit import log_action
 from app.core.config import settings
+from app.db.session import transaction
 
 
 
@@ -24,37 +26,45 @@ class UserService:
     def get_by_id(self, user_id: int) -> Optional[User]:
         return self.session.get(User, user_id)
     
-    def create_user(self, user_data: UserCreate, created_by: User) -> User:
-        if self.get_by_email(user_data.email):
+    async def create_user(self, user_data: UserCreate, created_by: User) -> User:
+        """Called from the event loop: database work goes to the threadpool,
+        hashing to the password pool."""
+        if await run_in_threadpool(self.get_by_email, user_data.email):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
+        password_hash = await password_pool.run(get_password_hash, user_data.password)
+        return await run_in_threadpool(self._insert_user, user_data, password_hash, created_by)
+
+    def _insert_user(self, user_data: UserCreate, password_hash: str, created_by: User) -> User:
         new_user = User(
             email=user_data.email,
-            password_hash= get_password_hash(user_data.password),
+            password_hash=password_hash,
             role = user_data.role
         )
 
-        self.session.add(new_user)
-        self.session.commit()
-        self.session.refresh(new_user)
-
-        log_action(
-            session=self.session,
-            user_id=created_by.id,
-            action="register_user",
-            entity_type=EntityType.user,
-            entity_id=new_user.id,
-            meta={"created_email": new_user.email, "role": new_user.role.value}
-        )
+        with transaction(self.session):
+            self.session.add(new_user)
+            self.session.flush()
+
+            log_action(
+                session=self.session,
+                user_id=created_by.id,
+                action="register_user",
+                entity_type=EntityType.user,
+                entity_id=new_user.id,
+                meta={"created_email": new_user.email, "role": new_user.role.value}
+            )
 
+        self.session.refresh(new_user)
         return new_user
     
-    def authenticate(self, credentials: UserLogin) -> Token:
-        user = self.get_by_email(credentials.email)
+    async def authenticate(self, credentials: UserLogin) -> Token:
+        """Called from the event loop, like `create_user`."""
+        user = await run_in_threadpool(self.get_by_email, credentials.email)
 
-        if not user or not verify_password(credentials.password, user.password_hash):
+        if not user or not await password_pool.run(verify_password, credentials.password, user.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password",
@@ -66,20 +76,24 @@ class UserService:
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="User account is deactivated"
             )
-        
+
+        return await run_in_threadpool(self._issue_token, user)
+
+    def _issue_token(self, user: User) -> Token:
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
             data={"user_id": user.id, "role": user.role.value},
             expires_delta=access_token_expires
         )
 
-        log_action(
-            session=self.session,
-            user_id=user.id,
-            action="login",
-            entity_type=EntityType.user,
-            entity_id=user.id
-        )
+        with transaction(self.session):
+            log_action(
+                session=self.session,
+                user_id=user.id,
+                action="login",
+                entity_type=EntityType.user,
+                entity_id=user.id
+            )
 
         return Token(access_token=access_token, token_type="bearer")
     
@@ -87,7 +101,8 @@ class UserService:
             self, 
             skip: int = 0,
             limit: int = 20,
-            role: Optional[UserRole] = None 
+            role: Optional[UserRole] = None,
+            after_id: Optional[int] = None
     ) -> list[User]:
         
 
@@ -95,7 +110,10 @@ class UserService:
         if role:
             statement = statement.where(User.role == role)
 
-        statement = statement.offset(skip).limit(limit)
+        if after_id is not None:
+            statement = statement.where(User.id > after_id)
+
+        statement = statement.order_by(User.id).offset(skip).limit(limit)
         return list(self.session.exec(statement).all())
     
 
@@ -114,15 +132,24 @@ class UserService:
             )
 
         
-        user.is_active = False
-        self.session.add(user)
-        """
-        self.session.add(user) здесь не “добавляет нового пользователя”, 
-        а помечает измененный объект для сохранения. После user.is_active = False объект уже есть 
-        в БД, но ORM должен зафиксировать, что его нужно обновить. add() гарантирует, что при commit() 
-        изменение уйдет в базу.
-        """
-        self.session.commit()
+        with transaction(self.session):
+            user.is_active = False
+            self.session.add(user)
+            """
+            self.session.add(user) здесь не “добавляет нового пользователя”, 
+            а помечает измененный объект для сохранения. После user.is_active = False объект уже есть 
+            в БД, но ORM должен зафиксировать, что его нужно обновить. add() гарантирует, что при commit() 
+            изменение уйдет в базу.
+            """
+
+            log_action(
+                session=self.session,
+                user_id=deactivated_by.id,
+                action="deactivate_user",
+                entity_type=EntityType.user,
+                entity_id=user.id
+            )
+
         self.session.refresh(user) 
         """
         заново читает объект из базы после commit. Это нужно, чтобы в 
@@ -130,15 +157,6 @@ class UserService:
         события). Даже при простом is_active = False это безопасная привычка — вы гарантируете, 
         что возвращаете пользователю свежие данные, а не потенциально устаревшие из памяти ORM.
         """
-        
-
-        log_action(
-            session=self.session,
-            user_id=deactivated_by.id,
-            action="deactivate_user",
-            entity_type=EntityType.user,
-            entity_id=user.id
-        )
 
         return user
     